@@ -29,4 +29,16 @@ def create_app():
     from app.routes.agent_routes import agent_bp
     app.register_blueprint(agent_bp)
 
+    # RETRIEVER (embeddings + vector store) loaded once per worker
+    if app.config.get("RETRIEVER_WARMUP"):
+        from app.rag.registry import warm_up_retriever
+        warm_up_retriever()
+
+        if app.config.get("RETRIEVAL_PRECOMPUTE"):
+            import threading
+            from app.agent.core import precompute_workout_retrievals
+            threading.Thread(
+                target=precompute_workout_retrievals, name="retrieval-precompute", daemon=True
+            ).start()
+
     return app
@@ -0,0 +1,195 @@
+"""
+Semantic answer cache for chat Q&A
+- Questions are embedded with the Retriever's embeddings
+- A stored answer is reused when a previous question is similar enough
+- Entries are scoped by a fingerprint of the plans and chat history, so
+  answers that depend on a user's context are never served to someone else
+- LRU eviction + per-entry TTL
+"""
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+from app.config import Config
+from app.rag.registry import get_retriever
+from app.utils import metrics
+
+# Fingerprint of a prompt without any plan context
+GENERIC = "generic"
+
+
+def plan_fingerprint(workout_plan, meal_plan, chat_history=None) -> str | None:
+    """
+    Cache scope for a chat prompt.
+    - no plans, no history        -> GENERIC (shared by every user)
+    - plans / history + PLAN_SCOPED -> hash of the plans and the history
+    - plans / history otherwise     -> None (do not cache)
+    """
+    if not workout_plan and not meal_plan and not chat_history:
+        return GENERIC
+
+    if not Config.ANSWER_CACHE_PLAN_SCOPED:
+        return None
+
+    payload = json.dumps(
+        {"workout_plan": workout_plan, "meal_plan": meal_plan, "chat_history": chat_history or []},
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SemanticAnswerCache:
+    """
+    Thread-safe nearest-neighbour cache: (fingerprint, question vector) -> answer.
+
+    The fingerprint covers everything else in the prompt (plans, chat
+    history), so only the question itself is matched by similarity.
+    """
+
+    def __init__(self, maxsize: int = 1000, ttl: float = 6 * 3600, threshold: float = 0.95):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def lookup(self, vector, fingerprint: str) -> dict | None:
+        q = self._normalize(vector)
+        now = time.time()
+
+        with self._lock:
+            self._purge_expired(now)
+            candidates = [
+                (key, e) for key, e in self._entries.items()
+                if e["fingerprint"] == fingerprint
+            ]
+            if not candidates:
+                return None
+
+            sims = np.stack([e["vector"] for _, e in candidates]) @ q
+            best = int(np.argmax(sims))
+            if float(sims[best]) < self.threshold:
+                return None
+
+            key, entry = candidates[best]
+            entry["hits"] += 1
+            self._entries.move_to_end(key)
+            return dict(entry, similarity=float(sims[best]))
+
+    def store(self, vector, fingerprint: str, question: str, answer: str, ttl: float | None = None) -> None:
+        now = time.time()
+        entry = {
+            "question": question,
+            "answer": answer,
+            "fingerprint": fingerprint,
+            "vector": self._normalize(vector),
+            "created_at": now,
+            "expires_at": now + (ttl or self.ttl),
+            "hits": 0,
+        }
+
+        with self._lock:
+            self._entries[uuid.uuid4().hex] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                metrics.incr("answer_cache.eviction")
+
+    def _purge_expired(self, now: float) -> None:
+        expired = [k for k, e in self._entries.items() if e["expires_at"] <= now]
+        for k in expired:
+            del self._entries[k]
+        if expired:
+            metrics.incr("answer_cache.expired", len(expired))
+
+    def clear(self) -> int:
+        with self._lock:
+            n = len(self._entries)
+            self._entries.clear()
+        return n
+
+    def entries(self) -> list:
+        """Summary of live entries (most recently used last), without vectors."""
+        now = time.time()
+        with self._lock:
+            self._purge_expired(now)
+            return [
+                {
+                    "id": key,
+                    "question": e["question"],
+                    "answer_preview": e["answer"][:200],
+                    "scope": "generic" if e["fingerprint"] == GENERIC else "plan",
+                    "age_s": round(now - e["created_at"], 1),
+                    "ttl_s": round(e["expires_at"] - now, 1),
+                    "hits": e["hits"],
+                }
+                for key, e in self._entries.items()
+            ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl,
+            "threshold": self.threshold,
+            "hits": metrics.get_counter("answer_cache.hit"),
+            "misses": metrics.get_counter("answer_cache.miss"),
+        }
+
+
+_cache = SemanticAnswerCache(
+    maxsize=Config.ANSWER_CACHE_MAXSIZE,
+    ttl=Config.ANSWER_CACHE_TTL,
+    threshold=Config.ANSWER_CACHE_THRESHOLD,
+)
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    return _cache
+
+
+def _embed(question: str):
+    return get_retriever().embeddings.embed_query(question)
+
+
+def lookup_answer(question: str, fingerprint: str | None):
+    """
+    Returns (answer | None, vector | None).
+    The vector is handed back so a miss can be stored without embedding twice.
+    """
+    if not Config.ANSWER_CACHE_ENABLED or fingerprint is None:
+        return None, None
+
+    try:
+        vector = _embed(question)
+    except Exception:
+        return None, None
+
+    entry = _cache.lookup(vector, fingerprint)
+    if entry is None:
+        metrics.incr("answer_cache.miss")
+        return None, vector
+
+    metrics.incr("answer_cache.hit")
+    return entry["answer"], vector
+
+
+def store_answer(question: str, fingerprint: str | None, vector, answer: str) -> None:
+    if vector is None or fingerprint is None or not answer:
+        return
+    _cache.store(vector, fingerprint, question, answer)
@@ -1,28 +1,42 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 import re
 import json
 from pathlib import Path
 from functools import lru_cache
-from typing import Any
+from typing import Any, Iterator
 
-from app.agent.prompts import SYSTEM_PROMPT, MEAL_PLAN_PROMPT, WORKOUT_PROMPT
+from app.agent.prompts import SYSTEM_PROMPT, MEAL_PLAN_PROMPT, MEAL_PLAN_RULES_PROMPT, WORKOUT_PROMPT
 from app.agent.validator import validate_json
 from app.agent.planner import run_planner
-from app.agent.safety import run_safety_check
+from app.agent.safety import run_safety_check, arun_safety_check
+from app.agent.answer_cache import plan_fingerprint, lookup_answer, store_answer
+from app.agent import plan_templates
+from app.agent.meal_days import MealPlanAssembler
 from app.memory.store import get_user_state, save_plan, is_plan_active
-from app.rag.qa import answer_query
-from app.rag.retriever import Retriever
+from app.rag.registry import get_retriever
+from app.rag.context import pack_context
 from app.memory import get_session_memory, update_session_memory
+from app.config import Config
+from app.utils import metrics
 
 
 # =====================================================
 # CACHING
 # =====================================================
 
-@lru_cache(maxsize=1)
-def get_retriever():
-    """Singleton Retriever (vector store / embedding loaded once)"""
-    return Retriever()
+# Speculative mode: safety check and answer generation run side by side
+_speculative_executor = ThreadPoolExecutor(
+    max_workers=Config.SPECULATIVE_WORKERS,
+    thread_name_prefix="speculative"
+)
+
+# Per-day meal plan calls (MEAL_PLAN_PARALLEL)
+_meal_day_executor = ThreadPoolExecutor(
+    max_workers=Config.MEAL_PLAN_WORKERS,
+    thread_name_prefix="meal-day"
+)
 
 
 @lru_cache(maxsize=1)
@@ -75,21 +89,32 @@ def _safe_parse_json(text: str, required_keys):
 # Chat entry
 # =====================================================
 
-def handle_chat(llm, user_id: str, message: str):
-    # 1. Safety
-    safety = run_safety_check(llm, message)
-    if not safety["safe"]:
-        return {
-            "type": "message",
-            "message": (
-                "Tôi không thể hỗ trợ chẩn đoán hay điều trị y tế. "
-                "Vui lòng liên hệ chuyên gia y tế."
-            ),
-            "intent": "safety",
-            "decision": "refuse"
-        }
+def _refusal_response():
+    return {
+        "type": "message",
+        "message": (
+            "Tôi không thể hỗ trợ chẩn đoán hay điều trị y tế. "
+            "Vui lòng liên hệ chuyên gia y tế."
+        ),
+        "intent": "safety",
+        "decision": "refuse"
+    }
 
-    # 2. Load state
+
+def _answer_response(answer: str):
+    return {
+        "type": "message",
+        "message": answer,
+        "intent": "chat_qa",
+        "decision": "answer"
+    }
+
+
+def _build_chat_prompt(user_id: str, message: str):
+    """Load plans + chat history and build the Q&A prompt.
+
+    Returns (chat_history, user_prompt, cache_fingerprint).
+    """
     state = get_user_state(user_id)
 
     workout_plan = state.get("workout_plan")
@@ -98,7 +123,6 @@ def handle_chat(llm, user_id: str, message: str):
     session = get_session_memory(user_id)
     chat_history = session.get("chat_history", [])
 
-    # 3. Prompt-driven Q&A
     prompt_input = {
         "workout_plan": workout_plan,
         "meal_plan": meal_plan,
@@ -106,8 +130,14 @@ def handle_chat(llm, user_id: str, message: str):
         "user_question": message
     }
 
-    answer = llm.chat(SYSTEM_PROMPT, json.dumps(prompt_input, ensure_ascii=False))
+    return (
+        chat_history,
+        json.dumps(prompt_input, ensure_ascii=False),
+        plan_fingerprint(workout_plan, meal_plan, chat_history),
+    )
 
+
+def _remember_chat(user_id: str, chat_history: list, message: str, answer: str) -> None:
     new_history = (
         chat_history
         + [{"role": "user", "content": message}]
@@ -119,27 +149,189 @@ def handle_chat(llm, user_id: str, message: str):
         "last_intent": "chat_qa"
     })
 
-    return {
-        "type": "message",
-        "message": answer,
-        "intent": "chat_qa",
-        "decision": "answer"
-    }
+
+def _count_wasted(answer_future) -> None:
+    # Cost of a dropped speculative answer, recorded once the generation finishes
+    def _done(f):
+        if not f.cancelled() and f.exception() is None:
+            metrics.incr("chat.speculative.wasted_chars", len(f.result() or ""))
+
+    metrics.incr("chat.speculative.wasted")
+    answer_future.add_done_callback(_done)
+
+
+def handle_chat(llm, user_id: str, message: str):
+    if Config.SAFETY_SPECULATIVE:
+        return _handle_chat_speculative(llm, user_id, message)
+
+    # 1. Safety
+    safety = run_safety_check(llm, message)
+    if not safety["safe"]:
+        return _refusal_response()
+
+    # 2. Load state
+    chat_history, user_prompt, fingerprint = _build_chat_prompt(user_id, message)
+
+    # 3. Semantic cache, then prompt-driven Q&A
+    answer, vector = lookup_answer(message, fingerprint)
+    if answer is None:
+        answer = llm.chat(SYSTEM_PROMPT, user_prompt)
+        store_answer(message, fingerprint, vector, answer)
+
+    _remember_chat(user_id, chat_history, message, answer)
+
+    return _answer_response(answer)
+
+
+def _handle_chat_speculative(llm, user_id: str, message: str):
+    metrics.incr("chat.speculative.started")
+
+    # 1. Safety + answer in parallel (state is loaded here, on the request thread)
+    safety_future = _speculative_executor.submit(run_safety_check, llm, message)
+    chat_history, user_prompt, fingerprint = _build_chat_prompt(user_id, message)
+
+    answer, vector = lookup_answer(message, fingerprint)
+    answer_future = None
+    if answer is None:
+        answer_future = _speculative_executor.submit(llm.chat, SYSTEM_PROMPT, user_prompt)
+
+    # 2. Unsafe -> refuse as soon as the verdict is known, drop the answer
+    safety = safety_future.result()
+    if not safety["safe"]:
+        if answer_future is not None:
+            answer_future.cancel()
+            _count_wasted(answer_future)
+        return _refusal_response()
+
+    if answer_future is not None:
+        answer = answer_future.result()
+        store_answer(message, fingerprint, vector, answer)
+
+    _remember_chat(user_id, chat_history, message, answer)
+
+    return _answer_response(answer)
+
+
+def handle_chat_stream(llm, user_id: str, message: str) -> Iterator[dict]:
+    """
+    Streaming variant of handle_chat.
+
+    Yields events {"event": ..., "data": ...}:
+    - "token": {"delta": str} for each piece of the answer
+    - "done":  the same payload handle_chat returns
+    Session memory is only updated once the whole answer has been generated.
+    In speculative mode tokens are withheld until the safety verdict is known.
+    """
+    if Config.SAFETY_SPECULATIVE:
+        yield from _handle_chat_stream_speculative(llm, user_id, message)
+        return
+
+    # 1. Safety
+    safety = run_safety_check(llm, message)
+    if not safety["safe"]:
+        yield {"event": "done", "data": _refusal_response()}
+        return
+
+    # 2. Load state
+    chat_history, user_prompt, fingerprint = _build_chat_prompt(user_id, message)
+
+    # 3. Semantic cache, then prompt-driven Q&A
+    answer, vector = lookup_answer(message, fingerprint)
+    if answer is not None:
+        yield {"event": "token", "data": {"delta": answer}}
+    else:
+        parts = []
+        for delta in llm.chat_stream(SYSTEM_PROMPT, user_prompt):
+            parts.append(delta)
+            yield {"event": "token", "data": {"delta": delta}}
+
+        answer = "".join(parts)
+        store_answer(message, fingerprint, vector, answer)
+
+    _remember_chat(user_id, chat_history, message, answer)
+
+    yield {"event": "done", "data": _answer_response(answer)}
+
+
+def _handle_chat_stream_speculative(llm, user_id: str, message: str) -> Iterator[dict]:
+    metrics.incr("chat.speculative.started")
+
+    safety_future = _speculative_executor.submit(run_safety_check, llm, message)
+    chat_history, user_prompt, fingerprint = _build_chat_prompt(user_id, message)
+
+    answer, vector = lookup_answer(message, fingerprint)
+    if answer is not None:
+        if not safety_future.result()["safe"]:
+            yield {"event": "done", "data": _refusal_response()}
+            return
+        yield {"event": "token", "data": {"delta": answer}}
+        _remember_chat(user_id, chat_history, message, answer)
+        yield {"event": "done", "data": _answer_response(answer)}
+        return
+
+    safety = None
+    parts, withheld = [], []
+    stream = llm.chat_stream(SYSTEM_PROMPT, user_prompt)
+    try:
+        for delta in stream:
+            parts.append(delta)
+
+            if safety is None and safety_future.done():
+                safety = safety_future.result()
+                if not safety["safe"]:
+                    # stop consuming: closing the stream ends the generation early
+                    break
+                if withheld:
+                    yield {"event": "token", "data": {"delta": "".join(withheld)}}
+                    withheld = []
+
+            if safety is None:
+                withheld.append(delta)
+            else:
+                yield {"event": "token", "data": {"delta": delta}}
+    finally:
+        stream.close()
+
+    if safety is None:
+        safety = safety_future.result()
+
+    if not safety["safe"]:
+        metrics.incr("chat.speculative.wasted")
+        metrics.incr("chat.speculative.wasted_chars", sum(len(p) for p in parts))
+        yield {"event": "done", "data": _refusal_response()}
+        return
+
+    if withheld:
+        yield {"event": "token", "data": {"delta": "".join(withheld)}}
+
+    answer = "".join(parts)
+    store_answer(message, fingerprint, vector, answer)
+    _remember_chat(user_id, chat_history, message, answer)
+
+    yield {"event": "done", "data": _answer_response(answer)}
 
 
 # =====================================================
 # Explicit actions (BUTTONS)
 # =====================================================
 
-def create_meal_plan(llm, user_id: str, profile: Any):
-    """
-    profile: AIProfileInputDTO
-    """
+def _plan_template(kind: str, user_id: str, profile: Any):
+    """(plan, edit_prompt) from plan_templates.match; (None, None) -> full generation."""
+    goals = get_user_state(user_id).get("goals")
+    return plan_templates.match(kind, profile, goals)
+
 
+def _meal_plan_prompt(user_id: str, profile: Any, in_parts: bool = False) -> str:
     # ===== LOAD USER STATE (FROM DB VIA MEMORY) =====
     state = get_user_state(user_id)
-    goals = state.get("goals")
+    return build_meal_plan_prompt(profile, state.get("goals"), in_parts=in_parts)
 
+
+def build_meal_plan_prompt(profile: Any, goals: Any, days: int | None = None, in_parts: bool = False) -> str:
+    """
+    days: fixed number of days instead of "today until Sunday" (plan templates)
+    in_parts: no day range at all, MealPlanAssembler names the days of each call
+    """
     # ===== RAG =====
     retriever = get_retriever()
     try:
@@ -150,16 +342,19 @@ def create_meal_plan(llm, user_id: str, profile: Any):
             f"gender={profile.gender}"
         )
         docs = retriever.retrieve(expanded_q, k=8, filters={"locale": "vi"})
-        context = "\n\n".join(
-            f"[{d['metadata'].get('source')}]\n{d['page_content']}"
-            for d in docs
-        )
+        context, _ = pack_context(docs)
     except Exception:
         context = ""
 
     # ===== PROMPT =====
-    prompt = (
-        MEAL_PLAN_PROMPT
+    if in_parts:
+        prompt = MEAL_PLAN_RULES_PROMPT
+    elif days:
+        prompt = f"\nProduce a meal plan of exactly {days} days, day1..day{days}.\n" + MEAL_PLAN_RULES_PROMPT
+    else:
+        prompt = MEAL_PLAN_PROMPT
+    return (
+        prompt
         + "\n\nContext:\n" + context
         + "\n\nUser profile:\n"
         + json.dumps(
@@ -174,12 +369,17 @@ def create_meal_plan(llm, user_id: str, profile: Any):
         )
     )
 
-    plan_text = llm.chat(SYSTEM_PROMPT, prompt)
+
+def _store_meal_plan(user_id: str, plan_text: str):
     plan = _safe_parse_json(plan_text, ["daily_meals", "explanation", "disclaimer"])
 
     if not plan:
         return {"type": "error", "message": "Failed to parse meal plan"}
 
+    return _save_meal_plan(user_id, plan)
+
+
+def _save_meal_plan(user_id: str, plan: dict):
     # ===== SAVE TO DB VIA MEMORY =====
     start, end = default_plan_window()
     save_plan(user_id, "meal_plan", plan, start, end)
@@ -191,36 +391,118 @@ def create_meal_plan(llm, user_id: str, profile: Any):
     }
 
 
-def create_workout_plan(llm, user_id: str, profile: Any):
+def create_meal_plan(llm, user_id: str, profile: Any):
     """
     profile: AIProfileInputDTO
     """
+    plan, edit_prompt = _plan_template("meal_plan", user_id, profile)
+    if edit_prompt:
+        plan = plan_templates.apply_edit("meal_plan", plan, llm.chat(SYSTEM_PROMPT, edit_prompt), profile)
+    if plan:
+        return _save_meal_plan(user_id, plan)
+
+    prompt = _meal_plan_prompt(user_id, profile, in_parts=Config.MEAL_PLAN_PARALLEL)
+    if Config.MEAL_PLAN_PARALLEL:
+        return _create_meal_plan_parallel(llm, user_id, profile, prompt)
 
+    plan_text = llm.chat(SYSTEM_PROMPT, prompt)
+    return _store_meal_plan(user_id, plan_text)
+
+
+def _meal_days(profile: Any, prompt: str) -> MealPlanAssembler:
+    return MealPlanAssembler(
+        prompt,
+        profile.calorie_target,
+        plan_templates.days_left_in_week(),
+        Config.MEAL_PLAN_DAYS_PER_CALL,
+    )
+
+
+def _chat_or_none(llm, prompt: str) -> str | None:
+    try:
+        return llm.chat(SYSTEM_PROMPT, prompt)
+    except Exception as e:
+        print(f"[meal_plan] day call failed: {e}")
+        return None
+
+
+def _store_meal_days(user_id: str, days: MealPlanAssembler):
+    plan = days.result(final=True)
+    if not plan:
+        print(f"[meal_plan] days still invalid after retries: {days.describe_failures()}")
+        return {"type": "error", "message": "Failed to parse meal plan"}
+    return _save_meal_plan(user_id, plan)
+
+
+def _create_meal_plan_parallel(llm, user_id: str, profile: Any, prompt: str):
+    """One call per day group in parallel; only the failed days are retried."""
+    days = _meal_days(profile, prompt)
+    for _ in range(Config.MEAL_PLAN_DAY_RETRIES + 1):
+        groups = days.pending_groups()
+        if not groups:
+            break
+        texts = _meal_day_executor.map(lambda g: _chat_or_none(llm, days.prompt(g)), groups)
+        for group, text in zip(groups, texts):
+            days.add(group, text)
+    return _store_meal_days(user_id, days)
+
+
+WORKOUT_RETRIEVAL_K = 6
+
+
+def _workout_query(experience_level, goal, days) -> str:
+    # Clients send "Beginner" / "Gain_Muscle": normalized so live requests
+    # hit the keys precomputed from Config.WORKOUT_* values
+    experience_level = str(experience_level or "").strip().lower()
+    goal = str(goal or "").strip().lower()
+    return (
+        f"workout plan guidance "
+        f"experience={experience_level} "
+        f"goal={goal} "
+        f"days={days}"
+    )
+
+
+def precompute_workout_retrievals() -> int:
+    """
+    Warm the retrieval cache for every goal x experience x days combination
+    (the workout query only depends on these three fields).
+    """
+    retriever = get_retriever()
+    count = 0
+    for goal in Config.WORKOUT_GOALS:
+        for level in Config.WORKOUT_EXPERIENCE_LEVELS:
+            for days in range(1, 8):
+                try:
+                    retriever.retrieve(_workout_query(level, goal, days), k=WORKOUT_RETRIEVAL_K)
+                    count += 1
+                except Exception as e:
+                    print(f"[retriever] precompute failed: {e}")
+                    return count
+    print(f"[retriever] precomputed {count} workout retrievals")
+    return count
+
+
+def _workout_plan_prompt(user_id: str, profile: Any) -> str:
     # ===== LOAD USER STATE =====
     state = get_user_state(user_id)
-    goals = state.get("goals")
-    goal = profile.goal or "general_fitness"
+    return build_workout_plan_prompt(profile, state.get("goals"))
 
 
+def build_workout_plan_prompt(profile: Any, goals: Any) -> str:
+    goal = profile.goal or "general_fitness"
+
     # ===== RAG =====
     retriever = get_retriever()
     try:
-        expanded_q = (
-            f"workout plan guidance "
-            f"experience={profile.experience_level} "
-            f"goal={goal} "
-            f"days={profile.available_days_per_week}"
-        )
-        docs = retriever.retrieve(expanded_q, k=6)
-        context = "\n\n".join(
-            f"[{d['metadata'].get('source')}]\n{d['page_content']}"
-            for d in docs
-        )
+        expanded_q = _workout_query(profile.experience_level, goal, profile.available_days_per_week)
+        docs = retriever.retrieve(expanded_q, k=WORKOUT_RETRIEVAL_K)
+        context, _ = pack_context(docs)
     except Exception:
         context = ""
 
     # ===== PROMPT =====
-    prompt = (
+    return (
         WORKOUT_PROMPT
         + "\n\nContext:\n" + context
         + "\n\nUser profile:\n"
@@ -242,12 +524,17 @@ def create_workout_plan(llm, user_id: str, profile: Any):
         )
     )
 
-    plan_text = llm.chat(SYSTEM_PROMPT, prompt)
+
+def _store_workout_plan(user_id: str, plan_text: str):
     plan = _safe_parse_json(plan_text, ["weekly_schedule", "explanation", "disclaimer"])
 
     if not plan:
         return {"type": "error", "message": "Failed to parse workout plan"}
 
+    return _save_workout_plan(user_id, plan)
+
+
+def _save_workout_plan(user_id: str, plan: dict):
     # ===== SAVE TO DB VIA MEMORY =====
     start, end = default_plan_window()
     save_plan(user_id, "workout_plan", plan, start, end)
@@ -257,3 +544,130 @@ def create_workout_plan(llm, user_id: str, profile: Any):
         "message": "New workout plan has been created for this week.",
         "plan": plan,
     }
+
+
+def create_workout_plan(llm, user_id: str, profile: Any):
+    """
+    profile: AIProfileInputDTO
+    """
+    plan, edit_prompt = _plan_template("workout_plan", user_id, profile)
+    if edit_prompt:
+        plan = plan_templates.apply_edit("workout_plan", plan, llm.chat(SYSTEM_PROMPT, edit_prompt), profile)
+    if plan:
+        return _save_workout_plan(user_id, plan)
+
+    prompt = _workout_plan_prompt(user_id, profile)
+    plan_text = llm.chat(SYSTEM_PROMPT, prompt)
+    return _store_workout_plan(user_id, plan_text)
+
+
+# =====================================================
+# Async entry points (ASGI)
+# =====================================================
+# LLM calls are awaited natively; DB / retriever work is blocking and runs
+# in a worker thread (the caller's app context is propagated via contextvars).
+
+async def ahandle_chat(llm, user_id: str, message: str):
+    if Config.SAFETY_SPECULATIVE:
+        return await _ahandle_chat_speculative(llm, user_id, message)
+
+    safety = await arun_safety_check(llm, message)
+    if not safety["safe"]:
+        return _refusal_response()
+
+    chat_history, user_prompt, fingerprint = await asyncio.to_thread(_build_chat_prompt, user_id, message)
+
+    answer, vector = await asyncio.to_thread(lookup_answer, message, fingerprint)
+    if answer is None:
+        answer = await llm.achat(SYSTEM_PROMPT, user_prompt)
+        await asyncio.to_thread(store_answer, message, fingerprint, vector, answer)
+
+    await asyncio.to_thread(_remember_chat, user_id, chat_history, message, answer)
+
+    return _answer_response(answer)
+
+
+async def _ahandle_chat_speculative(llm, user_id: str, message: str):
+    metrics.incr("chat.speculative.started")
+
+    safety_task = asyncio.create_task(arun_safety_check(llm, message))
+    try:
+        chat_history, user_prompt, fingerprint = await asyncio.to_thread(_build_chat_prompt, user_id, message)
+        answer, vector = await asyncio.to_thread(lookup_answer, message, fingerprint)
+    except BaseException:
+        # nobody awaits the check any more: don't leave it running
+        safety_task.cancel()
+        raise
+
+    answer_task = None
+    if answer is None:
+        answer_task = asyncio.create_task(llm.achat(SYSTEM_PROMPT, user_prompt))
+
+    try:
+        safety = await safety_task
+    except BaseException:
+        if answer_task is not None:
+            answer_task.cancel()
+        raise
+
+    if not safety["safe"]:
+        # the in-flight HTTP call is cancelled, so only the partial generation is wasted
+        if answer_task is not None:
+            answer_task.cancel()
+            metrics.incr("chat.speculative.wasted")
+        return _refusal_response()
+
+    if answer_task is not None:
+        answer = await answer_task
+        await asyncio.to_thread(store_answer, message, fingerprint, vector, answer)
+
+    await asyncio.to_thread(_remember_chat, user_id, chat_history, message, answer)
+
+    return _answer_response(answer)
+
+
+async def acreate_meal_plan(llm, user_id: str, profile: Any):
+    plan, edit_prompt = await asyncio.to_thread(_plan_template, "meal_plan", user_id, profile)
+    if edit_prompt:
+        edit_text = await llm.achat(SYSTEM_PROMPT, edit_prompt)
+        plan = plan_templates.apply_edit("meal_plan", plan, edit_text, profile)
+    if plan:
+        return await asyncio.to_thread(_save_meal_plan, user_id, plan)
+
+    prompt = await asyncio.to_thread(_meal_plan_prompt, user_id, profile, Config.MEAL_PLAN_PARALLEL)
+    if Config.MEAL_PLAN_PARALLEL:
+        return await _acreate_meal_plan_parallel(llm, user_id, profile, prompt)
+
+    plan_text = await llm.achat(SYSTEM_PROMPT, prompt)
+    return await asyncio.to_thread(_store_meal_plan, user_id, plan_text)
+
+
+async def _acreate_meal_plan_parallel(llm, user_id: str, profile: Any, prompt: str):
+    days = _meal_days(profile, prompt)
+    for _ in range(Config.MEAL_PLAN_DAY_RETRIES + 1):
+        groups = days.pending_groups()
+        if not groups:
+            break
+        texts = await asyncio.gather(
+            *(llm.achat(SYSTEM_PROMPT, days.prompt(g)) for g in groups),
+            return_exceptions=True,
+        )
+        for group, text in zip(groups, texts):
+            if isinstance(text, BaseException):
+                print(f"[meal_plan] day call failed: {text}")
+                text = None
+            days.add(group, text)
+    return await asyncio.to_thread(_store_meal_days, user_id, days)
+
+
+async def acreate_workout_plan(llm, user_id: str, profile: Any):
+    plan, edit_prompt = await asyncio.to_thread(_plan_template, "workout_plan", user_id, profile)
+    if edit_prompt:
+        edit_text = await llm.achat(SYSTEM_PROMPT, edit_prompt)
+        plan = plan_templates.apply_edit("workout_plan", plan, edit_text, profile)
+    if plan:
+        return await asyncio.to_thread(_save_workout_plan, user_id, plan)
+
+    prompt = await asyncio.to_thread(_workout_plan_prompt, user_id, profile)
+    plan_text = await llm.achat(SYSTEM_PROMPT, prompt)
+    return await asyncio.to_thread(_store_workout_plan, user_id, plan_text)
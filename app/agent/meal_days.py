@@ -0,0 +1,110 @@
+"""
+Per-day meal plan generation (MEAL_PLAN_PARALLEL)
+- one shared prompt (RAG context + profile, built once)
+- the week is split into groups of MEAL_PLAN_DAYS_PER_CALL days, generated
+  by parallel LLM calls: wall time ~ the slowest group, not the sum
+- every day is validated on its own; only failed days are asked again
+- days that still miss the calorie target after the last retry are kept
+  (the single-call path does not check calories either)
+- days are merged in day order into the usual {"daily_meals": ...} schema
+"""
+
+import json
+from typing import Dict, List
+
+from app.agent.plan_templates import calorie_error, check_meal_day
+from app.utils import metrics
+
+DEFAULT_DISCLAIMER = (
+    "This is general guidance and not medical advice. "
+    "Consult a healthcare professional for personalized medical recommendations."
+)
+
+
+class MealPlanAssembler:
+    def __init__(self, base_prompt: str, calorie_target: float, days: int, days_per_call: int = 1):
+        self.base_prompt = base_prompt
+        self.calorie_target = calorie_target
+        self.total_days = days
+        self.days_per_call = max(days_per_call, 1)
+        self.days: Dict[int, dict] = {}
+        # structurally valid days outside the calorie tolerance
+        self.off_target: Dict[int, dict] = {}
+        # lowest day of the group -> (explanation, disclaimer)
+        self.notes: Dict[int, tuple] = {}
+        self.errors: Dict[int, str] = {}
+        self._rounds = 0
+
+    def pending_groups(self) -> List[List[int]]:
+        """First round: groups of days_per_call; retries: each failed day alone."""
+        missing = [n for n in range(1, self.total_days + 1) if n not in self.days]
+        size = self.days_per_call if self._rounds == 0 else 1
+        self._rounds += 1
+        return [missing[i:i + size] for i in range(0, len(missing), size)]
+
+    def prompt(self, group: List[int]) -> str:
+        names = ", ".join(f"day{n}" for n in group)
+        return (
+            self.base_prompt
+            + f"\n\nProduce {names} of a {self.total_days}-day meal plan (day1 is today). "
+            "The other days are generated separately: vary dishes and main proteins "
+            "by day number so the week does not repeat.\n"
+            'Return {"daily_meals": {' + ", ".join(f'"day{n}": {{...}}' for n in group)
+            + '}, "explanation": "...", "disclaimer": "..."} with the same schema as above.'
+        )
+
+    def add(self, group: List[int], text: str | None) -> None:
+        from app.agent.core import _safe_parse_json
+
+        parsed = _safe_parse_json(text, ["daily_meals"]) if text else None
+        daily = parsed.get("daily_meals") if isinstance(parsed, dict) else None
+        if not isinstance(daily, dict):
+            daily = None
+
+        for n in group:
+            day = (daily or {}).get(f"day{n}")
+            error = check_meal_day(day)
+            if error is None:
+                error = calorie_error(day, self.calorie_target)
+                if error is not None:
+                    self.off_target[n] = day
+            if error is None:
+                self.days[n] = day
+                self.errors.pop(n, None)
+                self.off_target.pop(n, None)
+            else:
+                self.errors[n] = error if daily is not None else "invalid JSON"
+                metrics.incr("meal_plan.day_failed")
+
+        if daily is not None and parsed.get("explanation"):
+            self.notes[group[0]] = (parsed["explanation"], parsed.get("disclaimer"))
+
+    @property
+    def failed(self) -> List[int]:
+        return sorted(self.errors)
+
+    def result(self, final: bool = False) -> dict | None:
+        """
+        Merged plan once every day is valid, else None.
+        final (no retries left): days off the calorie target count as valid.
+        """
+        if final:
+            for n, day in self.off_target.items():
+                self.days.setdefault(n, day)
+                self.errors.pop(n, None)
+                metrics.incr("meal_plan.day_off_target")
+            self.off_target.clear()
+        if len(self.days) < self.total_days:
+            return None
+
+        explanation, disclaimer = next(
+            (self.notes[n] for n in sorted(self.notes)), ("", None)
+        )
+        return {
+            "daily_meals": {f"day{n}": self.days[n] for n in range(1, self.total_days + 1)},
+            "explanation": explanation,
+            "disclaimer": disclaimer or DEFAULT_DISCLAIMER,
+        }
+
+    def describe_failures(self) -> str:
+        return json.dumps({f"day{n}": e for n, e in sorted(self.errors.items())}, ensure_ascii=False)
@@ -0,0 +1,449 @@
+"""
+Precomputed plan templates
+Most profiles fall into a few buckets, so plans are generated offline per bucket:
+- meal_plan:    goal x gender x calorie band (PLAN_TEMPLATE_CALORIE_STEP)
+- workout_plan: goal x experience x days/week x session length
+Serving (core.create_meal_plan / create_workout_plan):
+- bucket hit -> the template, adapted without any LLM call
+  (meal: portions scaled to the exact calorie target, days cut to Sunday)
+- user has injuries / stated goals -> one small edit call that only returns
+  the parts to change (merged into the template)
+- miss or invalid edit -> normal full generation
+
+Batch job (re-run after prompt changes; --missing-only resumes):
+    python -m app.agent.plan_templates [--kind meal_plan|workout_plan] [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+from app.agent.prompts import PLAN_EDIT_PROMPT
+from app.config import Config
+from app.utils import metrics
+
+KINDS = ("meal_plan", "workout_plan")
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+# Meal templates are scaled to the user's target: at most +-10% (half a band)
+MAX_SCALE_DELTA = 0.1
+CALORIE_TOLERANCE = 0.1
+# Session lengths further than this from every bucket are a miss
+MAX_SESSION_DELTA = 15
+
+_SCALED_KEYS = {"amount_g", "calories", "protein_g", "carbs_g", "fat_g", "daily_calories"}
+
+
+# =====================================================
+# Buckets
+# =====================================================
+
+def _norm(value: Any) -> str:
+    return str(value or "").strip().lower()
+
+
+def calorie_band(calorie_target: int) -> int | None:
+    step = Config.PLAN_TEMPLATE_CALORIE_STEP
+    band = int(round(calorie_target / step) * step)
+    if not Config.PLAN_TEMPLATE_CALORIE_MIN <= band <= Config.PLAN_TEMPLATE_CALORIE_MAX:
+        return None
+    return band
+
+
+def meal_bucket(profile: Any) -> str | None:
+    goal, gender = _norm(profile.goal), _norm(profile.gender)
+    if goal not in Config.PLAN_TEMPLATE_GOALS or gender not in Config.PLAN_TEMPLATE_GENDERS:
+        return None
+    band = calorie_band(profile.calorie_target or 0)
+    if band is None:
+        return None
+    return f"{goal}|{gender}|{band}"
+
+
+def workout_bucket(profile: Any) -> str | None:
+    goal = _norm(profile.goal or "general_fitness")
+    level = _norm(profile.experience_level)
+    if goal not in Config.PLAN_TEMPLATE_GOALS or level not in Config.WORKOUT_EXPERIENCE_LEVELS:
+        return None
+
+    days = profile.available_days_per_week
+    if not days or not 1 <= days <= 7:
+        return None
+
+    minutes = profile.session_duration_minutes or 0
+    session = min(Config.PLAN_TEMPLATE_SESSION_LENGTHS, key=lambda m: abs(m - minutes))
+    if abs(session - minutes) > MAX_SESSION_DELTA:
+        return None
+    return f"{goal}|{level}|{days}|{session}"
+
+
+def bucket(kind: str, profile: Any) -> str | None:
+    return meal_bucket(profile) if kind == "meal_plan" else workout_bucket(profile)
+
+
+def iter_buckets(kind: str) -> Iterator[Tuple[str, Any]]:
+    """Every bucket key with a representative profile to generate it from."""
+    from app.dto.ai_profile_input_dto import AIProfileInputDTO
+
+    def profile(**fields):
+        base = dict(
+            age=30, gender="", height_cm=None, weight_kg=None, experience_level="",
+            goal="", available_days_per_week=0, session_duration_minutes=0,
+            injuries=[], calorie_target=0,
+        )
+        return AIProfileInputDTO(**dict(base, **fields))
+
+    if kind == "meal_plan":
+        step = Config.PLAN_TEMPLATE_CALORIE_STEP
+        for goal in Config.PLAN_TEMPLATE_GOALS:
+            for gender in Config.PLAN_TEMPLATE_GENDERS:
+                for band in range(Config.PLAN_TEMPLATE_CALORIE_MIN, Config.PLAN_TEMPLATE_CALORIE_MAX + 1, step):
+                    p = profile(goal=goal, gender=gender, calorie_target=band)
+                    yield meal_bucket(p), p
+        return
+
+    for goal in Config.PLAN_TEMPLATE_GOALS:
+        for level in Config.WORKOUT_EXPERIENCE_LEVELS:
+            for days in range(1, 8):
+                for minutes in Config.PLAN_TEMPLATE_SESSION_LENGTHS:
+                    p = profile(
+                        goal=goal, experience_level=level,
+                        available_days_per_week=days, session_duration_minutes=minutes,
+                    )
+                    yield workout_bucket(p), p
+
+
+# =====================================================
+# Validation
+# =====================================================
+
+def _day_calories(day: dict) -> float:
+    total = 0.0
+    for name, meal in day.items():
+        if name == "daily_calories":
+            continue
+        for m in meal if isinstance(meal, list) else [meal]:
+            if isinstance(m, dict):
+                total += float(m.get("nutrition", {}).get("calories") or 0)
+    return total
+
+
+def check_meal_day(day: Any) -> str | None:
+    """Structural error (missing meals, unreadable nutrition), or None."""
+    if not isinstance(day, dict):
+        return "missing"
+    for meal in ("breakfast", "lunch", "dinner"):
+        if not isinstance(day.get(meal), dict):
+            return f"missing {meal}"
+    try:
+        _day_calories(day)
+    except (TypeError, ValueError, AttributeError):
+        return "invalid nutrition"
+    return None
+
+
+def calorie_error(day: dict, calorie_target: float) -> str | None:
+    """Day total off the target by more than CALORIE_TOLERANCE (no target: never)."""
+    if not calorie_target or calorie_target <= 0:
+        return None
+    total = _day_calories(day)
+    if abs(total - calorie_target) > calorie_target * CALORIE_TOLERANCE:
+        return f"{total:.0f} kcal, target {calorie_target}"
+    return None
+
+
+def validate_meal_day(day: Any, calorie_target: float) -> str | None:
+    """Error message, or None when the day is usable."""
+    return check_meal_day(day) or calorie_error(day, calorie_target)
+
+
+def validate_meal_plan(plan: dict, days: int, calorie_target: float) -> str | None:
+    daily = plan.get("daily_meals")
+    if not isinstance(daily, dict):
+        return "missing daily_meals"
+    for i in range(1, days + 1):
+        error = validate_meal_day(daily.get(f"day{i}"), calorie_target)
+        if error:
+            return f"day{i}: {error}"
+    return None
+
+
+def validate_workout_plan(plan: dict, days: int) -> str | None:
+    schedule = plan.get("weekly_schedule")
+    if not isinstance(schedule, dict):
+        return "missing weekly_schedule"
+    missing = [d for d in WEEKDAYS if not isinstance(schedule.get(d), dict)]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    training = sum(1 for d in WEEKDAYS if schedule[d].get("exercises"))
+    if not 1 <= training <= days:
+        return f"{training} training days, {days} available"
+    return None
+
+
+def validate(kind: str, plan: dict, profile: Any, days: int | None = None) -> str | None:
+    if not isinstance(plan, dict) or not plan.get("explanation") or not plan.get("disclaimer"):
+        return "missing explanation / disclaimer"
+    if kind == "meal_plan":
+        return validate_meal_plan(plan, days or 7, profile.calorie_target)
+    return validate_workout_plan(plan, profile.available_days_per_week)
+
+
+# =====================================================
+# Store
+# =====================================================
+
+class PlanTemplateStore:
+    """
+    One JSON file per kind in PLAN_TEMPLATE_DIR ({bucket: plan}).
+    Reloaded when the file changes, so a finished batch job is picked up
+    without a restart.
+    """
+
+    def __init__(self, base_dir: str):
+        self.base = Path(base_dir)
+        self._lock = threading.Lock()
+        self._loaded: Dict[str, Tuple[float, Dict[str, dict]]] = {}
+
+    def _file(self, kind: str) -> Path:
+        return self.base / f"{kind}.json"
+
+    def templates(self, kind: str) -> Dict[str, dict]:
+        try:
+            mtime = self._file(kind).stat().st_mtime
+        except FileNotFoundError:
+            return {}
+
+        with self._lock:
+            loaded = self._loaded.get(kind)
+            if loaded is None or loaded[0] != mtime:
+                data = json.loads(self._file(kind).read_text(encoding="utf-8"))
+                loaded = self._loaded[kind] = (mtime, data)
+        return loaded[1]
+
+    def get(self, kind: str, key: str | None) -> dict | None:
+        if key is None:
+            return None
+        return self.templates(kind).get(key)
+
+    def save(self, kind: str, templates: Dict[str, dict]) -> None:
+        self.base.mkdir(parents=True, exist_ok=True)
+        tmp = self._file(kind).with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(templates, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self._file(kind))
+
+
+_store: PlanTemplateStore | None = None
+
+
+def get_store() -> PlanTemplateStore:
+    global _store
+    if _store is None:
+        _store = PlanTemplateStore(Config.PLAN_TEMPLATE_DIR)
+    return _store
+
+
+# =====================================================
+# Serving
+# =====================================================
+
+def _scale(value: Any, factor: float) -> Any:
+    if isinstance(value, dict):
+        return {
+            k: (round(v * factor, 1) if k in _SCALED_KEYS and isinstance(v, (int, float)) else _scale(v, factor))
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_scale(v, factor) for v in value]
+    return value
+
+
+def days_left_in_week(today: date | None = None) -> int:
+    """day1 = today ... Sunday (MEAL_PLAN_PROMPT)."""
+    return 7 - (today or date.today()).weekday()
+
+
+def _adapt_meal_plan(template: dict, calorie_target: int) -> dict | None:
+    band = float(calorie_band(calorie_target))
+    factor = calorie_target / band
+    if abs(factor - 1) > MAX_SCALE_DELTA:
+        return None
+
+    days = days_left_in_week()
+    plan = dict(template)
+    plan["daily_meals"] = {
+        f"day{i}": _scale(template["daily_meals"][f"day{i}"], factor)
+        for i in range(1, days + 1)
+    }
+    return plan
+
+
+def _profile_payload(kind: str, profile: Any, goals: Any) -> dict:
+    if kind == "meal_plan":
+        keys = ("calorie_target", "gender", "weight_kg", "goal")
+    else:
+        keys = (
+            "age", "gender", "height_cm", "weight_kg", "experience_level", "goal",
+            "available_days_per_week", "session_duration_minutes", "injuries",
+        )
+    return dict({k: getattr(profile, k) for k in keys}, goals=goals)
+
+
+def match(kind: str, profile: Any, goals: Any = None) -> Tuple[dict | None, str | None]:
+    """
+    (plan, None):        template ready to save, no LLM call needed
+    (plan, edit_prompt): template that needs one edit call (see apply_edit)
+    (None, None):        no usable template -> full generation
+    """
+    if not Config.PLAN_TEMPLATES_ENABLED:
+        return None, None
+
+    template = get_store().get(kind, bucket(kind, profile))
+    if template is not None and kind == "meal_plan":
+        template = _adapt_meal_plan(template, profile.calorie_target)
+    if template is None:
+        metrics.incr(f"plan_template.{kind}.miss")
+        return None, None
+
+    needs_edit = goals or (kind == "workout_plan" and profile.injuries)
+    if not needs_edit or not Config.PLAN_TEMPLATE_EDIT:
+        metrics.incr(f"plan_template.{kind}.hit")
+        return template, None
+
+    prompt = (
+        PLAN_EDIT_PROMPT
+        + "\n\nPlan:\n" + json.dumps(template, ensure_ascii=False)
+        + "\n\nUser profile:\n" + json.dumps(_profile_payload(kind, profile, goals), ensure_ascii=False)
+    )
+    return template, prompt
+
+
+# key holding the day-level objects of each plan kind
+_DAYS_KEY = {"meal_plan": "daily_meals", "workout_plan": "weekly_schedule"}
+
+
+def _merge(kind: str, template: dict, patch: dict) -> Tuple[dict | None, str | None]:
+    """
+    Apply the edit call's patch the way PLAN_EDIT_PROMPT describes it: every
+    returned day object replaces the template's day whole, other top-level
+    keys are replaced. -> (plan, None) or (None, error)
+    """
+    days_key = _DAYS_KEY[kind]
+    plan = dict(template)
+    for k, v in patch.items():
+        if k != days_key:
+            plan[k] = v
+    days = patch.get(days_key)
+    if days is None:
+        return plan, None
+    if not isinstance(days, dict):
+        return None, f"{days_key} is not an object"
+
+    template_days = template.get(days_key, {})
+    unknown = [d for d in days if d not in template_days]
+    if unknown:
+        return None, f"unknown days {', '.join(unknown)}"
+    if days and all(days[d] == template_days[d] for d in days):
+        return None, "patched days are unchanged"
+
+    plan[days_key] = dict(template_days, **days)
+    return plan, None
+
+
+def apply_edit(kind: str, template: dict, edit_text: str, profile: Any) -> dict | None:
+    """Apply the edit call's answer to the template; None if the result is invalid."""
+    from app.agent.core import _safe_parse_json
+
+    patch = _safe_parse_json(edit_text, [])
+    if not isinstance(patch, dict):
+        metrics.incr(f"plan_template.{kind}.edit_failed")
+        return None
+
+    plan, error = _merge(kind, template, patch)
+    if plan is not None:
+        days = len(template.get("daily_meals", {})) if kind == "meal_plan" else None
+        error = validate(kind, plan, profile, days)
+    if error:
+        print(f"[plan_templates] edit rejected: {error}")
+        metrics.incr(f"plan_template.{kind}.edit_failed")
+        return None
+
+    metrics.incr(f"plan_template.{kind}.edited")
+    return plan
+
+
+# =====================================================
+# Batch job
+# =====================================================
+
+def _generate(llm, kind: str, profile: Any, retries: int) -> dict | None:
+    from app.agent.core import (
+        SYSTEM_PROMPT, _safe_parse_json, build_meal_plan_prompt, build_workout_plan_prompt,
+    )
+
+    if kind == "meal_plan":
+        prompt = build_meal_plan_prompt(profile, goals=None, days=7)
+        required = ["daily_meals", "explanation", "disclaimer"]
+    else:
+        prompt = build_workout_plan_prompt(profile, goals=None)
+        required = ["weekly_schedule", "explanation", "disclaimer"]
+
+    for attempt in range(retries + 1):
+        plan = _safe_parse_json(llm.chat(SYSTEM_PROMPT, prompt), required)
+        error = "invalid JSON" if plan is None else validate(kind, plan, profile)
+        if error is None:
+            return plan
+        print(f"[plan_templates] {kind} {bucket(kind, profile)} attempt {attempt + 1}: {error}")
+    return None
+
+
+def generate_templates(kind: str, workers: int = 4, retries: int = 2, missing_only: bool = False) -> int:
+    """Generate and validate every bucket of `kind`; returns how many were written."""
+    from app.llm.factory import get_llm
+
+    llm = get_llm()
+    store = get_store()
+    # existing templates keep serving until their bucket is regenerated
+    templates = dict(store.templates(kind))
+    todo = [(key, p) for key, p in iter_buckets(kind) if not (missing_only and key in templates)]
+    print(f"[plan_templates] {kind}: {len(todo)} buckets to generate")
+
+    lock = threading.Lock()
+    written = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="plan-template") as pool:
+        futures = {pool.submit(_generate, llm, kind, p, retries): key for key, p in todo}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                plan = future.result()
+            except Exception as e:
+                print(f"[plan_templates] {kind} {key} failed: {e}")
+                continue
+            if plan is None:
+                continue
+            with lock:
+                templates[key] = plan
+                written += 1
+                # saved as we go: an interrupted run resumes with --missing-only
+                store.save(kind, templates)
+
+    print(f"[plan_templates] {kind}: {written}/{len(todo)} templates written")
+    return written
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Generate plan templates for every profile bucket")
+    parser.add_argument("--kind", choices=KINDS, help="Only one kind (default: both)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent LLM requests")
+    parser.add_argument("--retries", type=int, default=2, help="Extra attempts for an invalid plan")
+    parser.add_argument("--missing-only", action="store_true", help="Keep existing templates")
+    args = parser.parse_args()
+
+    for kind in [args.kind] if args.kind else KINDS:
+        generate_templates(kind, args.workers, args.retries, args.missing_only)
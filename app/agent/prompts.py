@@ -47,14 +47,18 @@ Behavior:
 Use this system role to enforce safety and structured-output requirements for the assistant.
 """
 
-MEAL_PLAN_PROMPT = """
+# Which days to produce; replaced when the days are fixed (plan templates)
+# or generated in parts (MEAL_PLAN_PARALLEL)
+MEAL_PLAN_WEEK_PROMPT = """
 Produce a meal plan starting from today and covering only the remaining days of the current week (ending on Sunday).
 
 The number of days must be calculated dynamically based on today’s date.
 - `day1` MUST represent today.
 - Subsequent days must be numbered sequentially (day2, day3, …) until Sunday.
 - Do NOT generate extra days beyond Sunday.
+"""
 
+MEAL_PLAN_RULES_PROMPT = """
 The meal plan must be generated according to the user’s stated preferences, including:
 - Whether the user wants a cleaner / healthier meal plan (simple ingredients, low oil, minimally processed foods)
 - Or a simpler / lighter meal plan with fewer dishes per day
@@ -164,6 +168,8 @@ Additional guidance:
 - If the user’s preferred language is Vietnamese, write `explanation` and `disclaimer` in Vietnamese.
 """
 
+MEAL_PLAN_PROMPT = MEAL_PLAN_WEEK_PROMPT + MEAL_PLAN_RULES_PROMPT
+
 WORKOUT_PROMPT = """
 Produce a weekly workout plan for a user. RETURN ONLY A JSON OBJECT that matches this schema EXACTLY:
 
@@ -193,4 +199,16 @@ Example valid output (trimmed):
 	"explanation": "Alternating strength and cardio for balanced fitness.",
 	"disclaimer": "Consult a professional before starting a new exercise program."
 }
-"""
\ No newline at end of file
+"""
+PLAN_EDIT_PROMPT = """
+You are given a pre-generated plan (JSON) and a user profile.
+Adapt the plan to this user with as few changes as possible:
+- Replace anything unsafe for the user's `injuries` (e.g. exercises loading an injured joint) with a safe alternative.
+- Respect the preferences and constraints stated in `goals` (foods to avoid, diet, schedule).
+- Keep the schema, keys, day names, number of days and daily calorie totals unchanged.
+
+RETURN ONLY A JSON OBJECT with the parts that must change, nested exactly like the plan, e.g.
+{"weekly_schedule": {"Tuesday": {"workout_type": "...", "exercises": [...]}}}
+Every object you return replaces the same object in the plan, so return it complete.
+Return {} if nothing needs to change. No markdown, no extra text.
+"""
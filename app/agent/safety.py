@@ -1,5 +1,15 @@
+import json
+import math
+import re
+import unicodedata
+from functools import lru_cache
+
+from app.config import Config
+from app.utils import metrics
 from app.utils.schema_validator import validate_with_schema
 from app.agent.schemas import SAFETY_SCHEMA
+from app.agent.safety_cache import get_cached_verdict, store_verdict, normalize_message
+from app.rag.registry import get_retriever
 
 
 SAFETY_PROMPT = """
@@ -65,8 +75,14 @@ Return ONLY the JSON object. Do not add explanations, text, or markdown.
 
 CONFIDENCE_THRESHOLD = 0.8
 
+SAFETY_TIERS = ("local", "embedding", "moderation", "llm")
+
 
 def run_safety_check(llm, message: str) -> dict:
+    cached = get_cached_verdict(message)
+    if cached:
+        return cached
+
     # 1) Prefer provider moderation if available
     try:
         mod = llm.moderate(message)
@@ -74,36 +90,234 @@ def run_safety_check(llm, message: str) -> dict:
         mod = None
 
     if mod:
-        # Expecting a structure like {"flagged": bool, "categories": {...}}
-        flagged = False
-        try:
-            flagged = bool(mod.get("flagged", False))
-        except Exception:
-            flagged = False
-
-        if flagged:
-            cats = mod.get("categories", {}) or {}
-            # pick a category mapping
-            if any(cats.get(k) for k in ("self-harm", "suicide", "violence")):
-                return {"safe": False, "category": "emergency", "confidence": 0.99, "reason": "moderation_flag"}
-            if any(cats.get(k) for k in ("medical", "health", "drugs")):
-                return {"safe": False, "category": "medical", "confidence": 0.9, "reason": "moderation_flag"}
-            # generic flagged
-            return {"safe": False, "category": "general", "confidence": 0.8, "reason": "moderation_flag"}
-
-        # not flagged => safe
-        return {"safe": True, "category": "general", "confidence": 0.99, "reason": "moderation_allow"}
-
-    # 2) Fall back to a model-based classifier that returns structured JSON + confidence
+        metrics.incr("safety.tier.moderation")
+        verdict = _verdict_from_moderation(mod)
+        store_verdict(message, verdict)
+        return verdict
+
+    # 2) Local tier: settles clear-cut messages without an LLM call (not worth caching)
+    verdict = local_safety_check(message)
+    if verdict:
+        return verdict
+
+    # 3) Fall back to a model-based classifier that returns structured JSON + confidence
+    metrics.incr("safety.tier.llm")
     output = llm.chat(SAFETY_PROMPT, message, temperature=0.0)
+    verdict = _verdict_from_llm_output(output)
+    store_verdict(message, verdict)
+    return verdict
+
+
+async def arun_safety_check(llm, message: str) -> dict:
+    """Async variant of run_safety_check (same verdict shape)."""
+    cached = get_cached_verdict(message)
+    if cached:
+        return cached
+
+    try:
+        mod = await llm.amoderate(message)
+    except Exception:
+        mod = None
+
+    if mod:
+        metrics.incr("safety.tier.moderation")
+        verdict = _verdict_from_moderation(mod)
+        store_verdict(message, verdict)
+        return verdict
+
+    verdict = local_safety_check(message)
+    if verdict:
+        return verdict
+
+    metrics.incr("safety.tier.llm")
+    output = await llm.achat(SAFETY_PROMPT, message, temperature=0.0)
+    verdict = _verdict_from_llm_output(output)
+    store_verdict(message, verdict)
+    return verdict
+
+
+def safety_tier_shares() -> dict:
+    """Share of safety checks resolved by each tier (local / embedding / moderation / llm)."""
+    counts = {t: metrics.get_counter(f"safety.tier.{t}") for t in SAFETY_TIERS}
+    total = sum(counts.values())
+    return {
+        "total": total,
+        "counts": counts,
+        "shares": {t: (c / total if total else 0.0) for t, c in counts.items()},
+    }
+
+
+# =====================================================
+# Local tier
+# =====================================================
+# Keyword / regex rules first (microseconds), then an optional
+# nearest-neighbour check against the few-shot examples above.
+# Only small talk and the few-shot general questions are settled as safe;
+# deny-list hits must be whole words / phrases in the message as typed
+# (no diacritic folding: "tu tu tap luyen" is not "tự tử").
+# Anything else returns None and goes to the LLM.
+
+# Below CONFIDENCE_THRESHOLD: local verdicts are never stored in the verdict cache
+LOCAL_CONFIDENCE = 0.75
+
+_EMERGENCY_TERMS = [
+    # vi
+    r"tự tử", r"tự sát", r"tự làm hại( bản thân)?", r"muốn chết", r"kết liễu", r"rạch tay",
+    r"nhịn ăn (nhiều|hoàn toàn|cả) (ngày|tuần)", r"không muốn ăn gì cả", r"móc họng", r"gây nôn",
+    r"chán ăn tâm thần", r"cuồng ăn", r"đau thắt ngực",
+    # en
+    r"suicide", r"suicidal", r"kill myself", r"self[- ]harm", r"end my life", r"want to die",
+    r"starve myself", r"starving myself", r"make myself (throw up|vomit)",
+    r"anorexia", r"bulimia",
+]
+
+_MEDICAL_TERMS = [
+    # vi
+    r"tiểu đường", r"đái tháo đường", r"huyết áp cao", r"ung thư", r"mang thai", r"có thai",
+    r"có bầu", r"suy thận", r"viêm gan", r"hen suyễn",
+    # en
+    r"diabetes", r"diabetic", r"hypertension", r"cancer", r"pregnant", r"asthma",
+]
+
+_SMALL_TALK = [
+    r"xin chào", r"chào( bạn)?", r"hello", r"hi", r"hey", r"cảm ơn( bạn)?", r"cám ơn( bạn)?",
+    r"thanks?( you)?", r"ok", r"oke", r"được rồi", r"tạm biệt", r"bye",
+]
+
+_KCAL_RE = re.compile(r"\b(\d{2,4})\s*(kcal|calo|calories)\b")
+_PER_DAY_RE = re.compile(r"\b(mỗi|một|1) ngày\b|\b(a|per) day\b|\bdaily\b")
+
+
+def _compile(terms) -> re.Pattern:
+    return re.compile("|".join(rf"(?<!\w)(?:{t})(?!\w)" for t in terms))
+
+
+_EMERGENCY_RE = _compile(_EMERGENCY_TERMS)
+_MEDICAL_RE = _compile(_MEDICAL_TERMS)
+_SMALL_TALK_RE = re.compile(
+    r"^\s*(" + "|".join(_SMALL_TALK) + r")[\s!.,?]*(bạn|nhé|nha|ạ|you)?[\s!.,?]*$"
+)
+
+
+def _local_verdict(safe: bool, category: str, reason: str) -> dict:
+    return {"safe": safe, "category": category, "confidence": LOCAL_CONFIDENCE, "reason": reason}
+
+
+def _keyword_check(message: str) -> dict | None:
+    text = unicodedata.normalize("NFC", message.lower()).strip()
+
+    if _EMERGENCY_RE.search(text):
+        return _local_verdict(False, "emergency", "keyword emergency")
+
+    low_kcal = any(int(m.group(1)) <= 800 for m in _KCAL_RE.finditer(text))
+    if low_kcal and _PER_DAY_RE.search(text):
+        return _local_verdict(False, "emergency", "keyword restriction")
+
+    if _MEDICAL_RE.search(text):
+        return _local_verdict(False, "medical", "keyword medical")
+
+    if _SMALL_TALK_RE.match(text):
+        return _local_verdict(True, "general", "keyword small talk")
 
+    if normalize_message(text) in _general_examples():
+        return _local_verdict(True, "general", "few-shot general")
+
+    return None
+
+
+_EXAMPLE_RE = re.compile(r'User: "(.+?)"\s*\nOutput: (\{.*?\})')
+
+
+@lru_cache(maxsize=1)
+def _general_examples() -> frozenset:
+    """Normalized few-shot questions of SAFETY_PROMPT labelled safe / general."""
+    return frozenset(
+        normalize_message(text)
+        for text, verdict in _EXAMPLE_RE.findall(SAFETY_PROMPT)
+        if json.loads(verdict).get("safe")
+    )
+
+
+@lru_cache(maxsize=1)
+def _example_index():
+    """Embed the few-shot examples of SAFETY_PROMPT once: [(vector, verdict)]."""
+    examples = [
+        (text, json.loads(verdict))
+        for text, verdict in _EXAMPLE_RE.findall(SAFETY_PROMPT)
+    ]
+    embeddings = get_retriever().embeddings
+    vectors = embeddings.embed_documents([text for text, _ in examples])
+    return [(_normalize(v), verdict) for v, (_, verdict) in zip(vectors, examples)]
+
+
+def _normalize(v) -> list:
+    norm = math.sqrt(sum(x * x for x in v)) or 1.0
+    return [x / norm for x in v]
+
+
+def _embedding_check(message: str) -> dict | None:
+    if not Config.SAFETY_EMBEDDING_CLASSIFIER:
+        return None
+
+    try:
+        index = _example_index()
+        q = _normalize(get_retriever().embeddings.embed_query(message))
+    except Exception:
+        return None
+
+    best_sim, best = max(
+        ((sum(a * b for a, b in zip(q, v)), verdict) for v, verdict in index),
+        key=lambda x: x[0],
+    )
+    if best_sim < Config.SAFETY_EMBEDDING_THRESHOLD:
+        return None
+
+    return dict(best, confidence=LOCAL_CONFIDENCE, reason=f"nearest example ({best_sim:.2f})")
+
+
+def local_safety_check(message: str) -> dict | None:
+    """Settle clear-cut messages locally; None means ambiguous (ask the LLM)."""
+    verdict = _keyword_check(message)
+    if verdict:
+        metrics.incr("safety.tier.local")
+        return verdict
+
+    verdict = _embedding_check(message)
+    if verdict:
+        metrics.incr("safety.tier.embedding")
+        return verdict
+
+    return None
+
+
+def _verdict_from_moderation(mod) -> dict:
+    # Expecting a structure like {"flagged": bool, "categories": {...}}
+    flagged = False
+    try:
+        flagged = bool(mod.get("flagged", False))
+    except Exception:
+        flagged = False
+
+    if flagged:
+        cats = mod.get("categories", {}) or {}
+        # pick a category mapping
+        if any(cats.get(k) for k in ("self-harm", "suicide", "violence")):
+            return {"safe": False, "category": "emergency", "confidence": 0.99, "reason": "moderation_flag"}
+        if any(cats.get(k) for k in ("medical", "health", "drugs")):
+            return {"safe": False, "category": "medical", "confidence": 0.9, "reason": "moderation_flag"}
+        # generic flagged
+        return {"safe": False, "category": "general", "confidence": 0.8, "reason": "moderation_flag"}
+
+    # not flagged => safe
+    return {"safe": True, "category": "general", "confidence": 0.99, "reason": "moderation_allow"}
+
+
+def _verdict_from_llm_output(output) -> dict:
     # Try validate directly
     try:
         parsed = validate_with_schema(output, SAFETY_SCHEMA)
     except ValueError:
         # attempt to extract JSON substring and map as before
-        import re, json
-
         m = re.search(r"\{[\s\S]*\}", str(output))
         if m:
             try:
@@ -0,0 +1,111 @@
+"""
+Safety verdict cache
+- Keyed by a hash of the normalized message (+ a version of the safety prompt)
+- In-process LRU + TTL, optionally backed by a SQLite file shared by all workers
+- Only confident, well-formed verdicts are stored
+"""
+
+import hashlib
+import json
+import re
+import unicodedata
+
+from app.config import Config
+from app.utils import metrics
+from app.utils.cache import TTLCache, SQLiteTTLStore
+
+_memory = TTLCache(
+    maxsize=Config.SAFETY_CACHE_MAXSIZE,
+    ttl=Config.SAFETY_CACHE_TTL,
+    name="safety.cache.memory",
+)
+
+_shared: SQLiteTTLStore | None = None
+if Config.SAFETY_CACHE_BACKEND == "sqlite":
+    _shared = SQLiteTTLStore(
+        Config.SAFETY_CACHE_PATH,
+        table="safety_verdicts",
+        max_rows=Config.SAFETY_CACHE_MAXSIZE * 10,
+    )
+
+# Verdicts that must never be reused
+_UNCACHEABLE_REASONS = {"invalid_safety_response", "low_confidence"}
+
+
+def normalize_message(message: str) -> str:
+    """NFC, lowercase, collapsed whitespace, no surrounding punctuation."""
+    text = unicodedata.normalize("NFC", message).lower()
+    text = re.sub(r"\s+", " ", text)
+    return text.strip(" \t\n.,!?;:…\"'")
+
+
+def _version() -> str:
+    # Changing the prompt or the threshold invalidates old (shared) entries
+    from app.agent.safety import SAFETY_PROMPT, CONFIDENCE_THRESHOLD
+    return hashlib.sha256(f"{SAFETY_PROMPT}|{CONFIDENCE_THRESHOLD}".encode("utf-8")).hexdigest()[:12]
+
+
+def verdict_key(message: str) -> str:
+    payload = f"{_version()}\n{normalize_message(message)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(verdict: dict) -> bool:
+    from app.agent.safety import CONFIDENCE_THRESHOLD
+
+    if not isinstance(verdict, dict) or "raw" in verdict:
+        return False
+    if verdict.get("category") not in ("general", "medical", "emergency"):
+        return False
+    if verdict.get("reason") in _UNCACHEABLE_REASONS:
+        return False
+    try:
+        return float(verdict.get("confidence", 0.0)) >= CONFIDENCE_THRESHOLD
+    except (TypeError, ValueError):
+        return False
+
+
+def get_cached_verdict(message: str) -> dict | None:
+    if not Config.SAFETY_CACHE_ENABLED:
+        return None
+
+    key = verdict_key(message)
+    verdict = _memory.get(key)
+
+    if verdict is None and _shared is not None:
+        raw = _shared.get(key)
+        if raw is not None:
+            verdict = json.loads(raw)
+            _memory.set(key, verdict)
+
+    metrics.incr("safety.cache.hit" if verdict is not None else "safety.cache.miss")
+    return dict(verdict) if verdict is not None else None
+
+
+def store_verdict(message: str, verdict: dict) -> None:
+    if not Config.SAFETY_CACHE_ENABLED:
+        return
+
+    if not is_cacheable(verdict):
+        metrics.incr("safety.cache.skip")
+        return
+
+    key = verdict_key(message)
+    _memory.set(key, dict(verdict))
+    if _shared is not None:
+        _shared.set(key, json.dumps(verdict, ensure_ascii=False), ttl=Config.SAFETY_CACHE_TTL)
+    metrics.incr("safety.cache.store")
+
+
+def clear_verdict_cache() -> None:
+    _memory.clear()
+    if _shared is not None:
+        _shared.clear()
+
+
+def verdict_cache_stats() -> dict:
+    return dict(
+        _memory.stats(),
+        backend=Config.SAFETY_CACHE_BACKEND,
+        shared_size=len(_shared) if _shared is not None else None,
+    )
@@ -0,0 +1,45 @@
+"""
+ASGI application
+- Async (asyncio) versions of the agent endpoints, served by uvicorn
+- Reuses the Flask app for config, JWT settings and the SQLAlchemy session
+"""
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+
+from app import create_app
+
+
+class FlaskAppContextMiddleware:
+    """Push a Flask app context per request so DB / JWT helpers keep working.
+
+    The context lives in contextvars, so `asyncio.to_thread` calls made by the
+    handlers see it as well.
+    """
+
+    def __init__(self, app, flask_app):
+        self.app = app
+        self.flask_app = flask_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with self.flask_app.app_context():
+            await self.app(scope, receive, send)
+
+
+def create_asgi_app() -> Starlette:
+    flask_app = create_app()
+
+    from app.routes.agent_async_routes import agent_async_routes
+
+    return Starlette(
+        routes=agent_async_routes,
+        middleware=[
+            Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]),
+            Middleware(FlaskAppContextMiddleware, flask_app=flask_app),
+        ],
+    )
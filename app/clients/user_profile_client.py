@@ -1,4 +1,5 @@
 import os
+import httpx
 import requests
 
 
@@ -27,3 +28,36 @@ class UserProfileClient:
         )
         resp.raise_for_status()
         return resp.json()
+
+
+class AsyncUserProfileClient:
+    """asyncio counterpart of UserProfileClient (used by the ASGI app)."""
+
+    BASE_URL = UserProfileClient.BASE_URL
+
+    _client: httpx.AsyncClient | None = None
+
+    @classmethod
+    def _http(cls) -> httpx.AsyncClient:
+        # One pooled client for the whole process
+        if cls._client is None:
+            cls._client = httpx.AsyncClient(timeout=5)
+        return cls._client
+
+    @classmethod
+    async def get_ai_profile_input(cls, access_token: str):
+        resp = await cls._http().get(
+            f"{cls.BASE_URL}/ai/profile-input",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    @classmethod
+    async def get_ai_goal_input(cls, access_token: str):
+        resp = await cls._http().get(
+            f"{cls.BASE_URL}/ai/goal-input",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        resp.raise_for_status()
+        return resp.json()
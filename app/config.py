@@ -21,8 +21,81 @@ class Config:
     LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
 
     # ===== RAG =====
-    DB_TYPE = os.getenv("DB_TYPE", "chroma")
-    EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")
+    DB_TYPE = os.getenv("DB_TYPE", "chroma")  # chroma | faiss | numpy
+    EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")  # openai | huggingface | onnx
+    # Local CPU embeddings (EMBEDDING_PROVIDER=onnx)
+    ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "data/models/all-MiniLM-L6-v2")
+    ONNX_MAX_BATCH = int(os.getenv("ONNX_MAX_BATCH", 32))
+    ONNX_MAX_WAIT_MS = float(os.getenv("ONNX_MAX_WAIT_MS", 2))
+    ONNX_THREADS = int(os.getenv("ONNX_THREADS", 0))  # 0 = onnxruntime default
+    CHROMA_DIR = os.getenv("CHROMA_DIR", "data/chroma_db")
+    FAISS_DIR = os.getenv("FAISS_DIR", "data/faiss_db")
+    NUMPY_DIR = os.getenv("NUMPY_DIR", "data/numpy_db")
+    # numpy backend first pass: none | int8 (re-ranked with float32); ingest writes
+    # the int8 copy only in int8 mode, so re-ingest after switching it on
+    NUMPY_QUANTIZATION = os.getenv("NUMPY_QUANTIZATION", "none")
+    NUMPY_RERANK_FACTOR = int(os.getenv("NUMPY_RERANK_FACTOR", 4))
+    # Dense + BM25 reciprocal-rank fusion (needs bm25.json from ingest)
+    HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+    HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", 60))
+    # Token budget for the retrieved context of one prompt (0 = no limit)
+    CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", 1500))
+    # Load the retriever in create_app instead of on the first request
+    # (off for scripts / tests; run.py and asgi.py turn it on)
+    RETRIEVER_WARMUP = os.getenv("RETRIEVER_WARMUP", "false").lower() == "true"
+    # Seconds between index-dir mtime checks (0 = never hot-reload)
+    RETRIEVER_RELOAD_INTERVAL = float(os.getenv("RETRIEVER_RELOAD_INTERVAL", 30))
+    # Query embedding cache (backend: memory | sqlite)
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_BACKEND = os.getenv("EMBEDDING_CACHE_BACKEND", "memory")
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/cache/query_embeddings.sqlite3")
+    EMBEDDING_CACHE_MAXSIZE = int(os.getenv("EMBEDDING_CACHE_MAXSIZE", 2048))
+    # Retrieval result cache, keyed by (query, k, filters, index version)
+    RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "true").lower() == "true"
+    RETRIEVAL_CACHE_MAXSIZE = int(os.getenv("RETRIEVAL_CACHE_MAXSIZE", 1024))
+    RETRIEVAL_CACHE_TTL = int(os.getenv("RETRIEVAL_CACHE_TTL", 0))  # 0 = until re-ingest
+    # Workout retrievals precomputed at startup (every goal x experience x days)
+    # (off for scripts / tests; run.py and asgi.py turn it on)
+    RETRIEVAL_PRECOMPUTE = os.getenv("RETRIEVAL_PRECOMPUTE", "false").lower() == "true"
+    WORKOUT_GOALS = os.getenv(
+        "WORKOUT_GOALS", "general_fitness,lose_weight,gain_muscle,maintain"
+    ).split(",")
+    WORKOUT_EXPERIENCE_LEVELS = os.getenv(
+        "WORKOUT_EXPERIENCE_LEVELS", "beginner,intermediate,advanced"
+    ).split(",")
+
+    # ===== MEAL PLAN GENERATION =====
+    # Generate the week as parallel per-day calls (validated and retried per day)
+    MEAL_PLAN_PARALLEL = os.getenv("MEAL_PLAN_PARALLEL", "false").lower() == "true"
+    MEAL_PLAN_DAYS_PER_CALL = int(os.getenv("MEAL_PLAN_DAYS_PER_CALL", 1))
+    MEAL_PLAN_DAY_RETRIES = int(os.getenv("MEAL_PLAN_DAY_RETRIES", 2))
+    MEAL_PLAN_WORKERS = int(os.getenv("MEAL_PLAN_WORKERS", 16))
+
+    # ===== PLAN TEMPLATES (python -m app.agent.plan_templates) =====
+    PLAN_TEMPLATES_ENABLED = os.getenv("PLAN_TEMPLATES_ENABLED", "true").lower() == "true"
+    PLAN_TEMPLATE_DIR = os.getenv("PLAN_TEMPLATE_DIR", "data/plan_templates")
+    # One edit call for users with injuries / stated goals (false: serve the template as is)
+    PLAN_TEMPLATE_EDIT = os.getenv("PLAN_TEMPLATE_EDIT", "true").lower() == "true"
+    PLAN_TEMPLATE_GOALS = os.getenv(
+        "PLAN_TEMPLATE_GOALS", "general_fitness,lose_weight,gain_muscle,maintain"
+    ).split(",")
+    PLAN_TEMPLATE_GENDERS = os.getenv("PLAN_TEMPLATE_GENDERS", "male,female").split(",")
+    PLAN_TEMPLATE_CALORIE_STEP = int(os.getenv("PLAN_TEMPLATE_CALORIE_STEP", 200))
+    PLAN_TEMPLATE_CALORIE_MIN = int(os.getenv("PLAN_TEMPLATE_CALORIE_MIN", 1200))
+    PLAN_TEMPLATE_CALORIE_MAX = int(os.getenv("PLAN_TEMPLATE_CALORIE_MAX", 3600))
+    PLAN_TEMPLATE_SESSION_LENGTHS = [
+        int(m) for m in os.getenv("PLAN_TEMPLATE_SESSION_LENGTHS", "30,45,60,90").split(",")
+    ]
+
+    # ===== INGEST =====
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 64))
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 4))
+    INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", 6))
+    # Processes parsing PDFs (1 = sequential)
+    INGEST_LOAD_WORKERS = int(os.getenv("INGEST_LOAD_WORKERS", os.cpu_count() or 1))
+    # Drop exact and near-duplicate (SimHash) chunks; 0 = exact only
+    INGEST_DEDUP = os.getenv("INGEST_DEDUP", "true").lower() == "true"
+    INGEST_SIMHASH_DISTANCE = int(os.getenv("INGEST_SIMHASH_DISTANCE", 3))
 
     # ===== OPENAI =====
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -34,6 +107,47 @@ class Config:
 
     # ===== AGENT SETTINGS =====
     DEFAULT_TEMPERATURE = float(os.getenv("DEFAULT_TEMPERATURE", 0.3))
+
+    # ===== USER STATE CACHE (memory.store) =====
+    USER_STATE_CACHE_MAXSIZE = int(os.getenv("USER_STATE_CACHE_MAXSIZE", 1024))
+    USER_STATE_CACHE_TTL = int(os.getenv("USER_STATE_CACHE_TTL", 300))
+
+    # ===== SESSION STORE (chat memory) =====
+    # memory | sqlite | redis
+    SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "memory")
+    SESSION_STORE_MAXSIZE = int(os.getenv("SESSION_STORE_MAXSIZE", 10000))
+    SESSION_SWEEP_INTERVAL = int(os.getenv("SESSION_SWEEP_INTERVAL", 60))
+    SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "data/cache/sessions.sqlite3")
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+    # ===== SAFETY =====
+    # Run the safety check and answer generation at the same time;
+    # the answer is dropped when safety comes back unsafe.
+    SAFETY_SPECULATIVE = os.getenv("SAFETY_SPECULATIVE", "false").lower() == "true"
+    SPECULATIVE_WORKERS = int(os.getenv("SPECULATIVE_WORKERS", 16))
+    # Nearest-neighbour check against the safety few-shot examples (one embedding call)
+    SAFETY_EMBEDDING_CLASSIFIER = os.getenv("SAFETY_EMBEDDING_CLASSIFIER", "false").lower() == "true"
+    SAFETY_EMBEDDING_THRESHOLD = float(os.getenv("SAFETY_EMBEDDING_THRESHOLD", 0.9))
+    # Verdict cache (backend: memory | sqlite)
+    SAFETY_CACHE_ENABLED = os.getenv("SAFETY_CACHE_ENABLED", "true").lower() == "true"
+    SAFETY_CACHE_BACKEND = os.getenv("SAFETY_CACHE_BACKEND", "memory")
+    SAFETY_CACHE_PATH = os.getenv("SAFETY_CACHE_PATH", "data/cache/safety_verdicts.sqlite3")
+    SAFETY_CACHE_MAXSIZE = int(os.getenv("SAFETY_CACHE_MAXSIZE", 4096))
+    SAFETY_CACHE_TTL = int(os.getenv("SAFETY_CACHE_TTL", 24 * 3600))
+
+    # ===== ANSWER CACHE (semantic, chat Q&A) =====
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "false").lower() == "true"
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+    ANSWER_CACHE_MAXSIZE = int(os.getenv("ANSWER_CACHE_MAXSIZE", 1000))
+    ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 6 * 3600))
+    # true: also cache answers for prompts with plans / chat history (keyed by their hash)
+    # false: only cache prompts without any user-specific context
+    ANSWER_CACHE_PLAN_SCOPED = os.getenv("ANSWER_CACHE_PLAN_SCOPED", "false").lower() == "true"
+
+    # ===== ADMIN =====
+    # Admin endpoints are disabled unless a key is configured (header X-Admin-Key)
+    ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
+
     # JWT
     SECRET_KEY = "kfhsk3jh2k3hk2h3k2h3k2h3h23jh23j423423"
     JWT_SECRET_KEY = "Some_super_secure_and_long_base64_encoded_secret_key_for_JSWT123"
@@ -0,0 +1,63 @@
+import hmac
+from functools import wraps
+
+from flask import request, jsonify
+
+from app.agent.answer_cache import get_answer_cache
+from app.agent.safety import safety_tier_shares
+from app.agent.safety_cache import verdict_cache_stats
+from app.config import Config
+from app.memory.session_memory import SESSION_TTL_SECONDS
+from app.memory.session_store import get_session_store
+from app.memory.store import user_state_cache_stats
+from app.rag.registry import get_registry
+from app.utils import metrics
+
+
+def admin_required(fn):
+    """Allow the call only with a valid X-Admin-Key header (disabled when ADMIN_API_KEY is unset)."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = Config.ADMIN_API_KEY
+        given = request.headers.get("X-Admin-Key", "")
+        if not key or not hmac.compare_digest(given, key):
+            return jsonify({"error": "Forbidden"}), 403
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
+class AdminController:
+
+    # =========================
+    # METRICS
+    # =========================
+    @staticmethod
+    @admin_required
+    def get_metrics():
+        prefix = request.args.get("prefix")
+        result = metrics.snapshot(prefix)
+        result["safety_tiers"] = safety_tier_shares()
+        result["safety_cache"] = verdict_cache_stats()
+        result["sessions"] = get_session_store(SESSION_TTL_SECONDS).stats()
+        result["user_state_cache"] = user_state_cache_stats()
+        result["retriever"] = get_registry().stats()
+        return jsonify(result), 200
+
+    # =========================
+    # ANSWER CACHE
+    # =========================
+    @staticmethod
+    @admin_required
+    def get_answer_cache():
+        cache = get_answer_cache()
+        return jsonify({
+            "stats": cache.stats(),
+            "entries": cache.entries(),
+        }), 200
+
+    @staticmethod
+    @admin_required
+    def flush_answer_cache():
+        removed = get_answer_cache().clear()
+        return jsonify({"type": "cache_flushed", "removed": removed}), 200
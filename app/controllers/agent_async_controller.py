@@ -0,0 +1,128 @@
+import asyncio
+import functools
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from app.dto.dtos import MealPlanProfileDTO, DTOValidationError, WorkoutPlanProfileDTO
+from app.llm import get_llm
+from app.services.agent_service import AgentService
+from app.clients.user_profile_client import AsyncUserProfileClient
+from app.utils.jwt_utils import get_access_token, get_user_id_from_access_token
+
+llm = get_llm()
+
+
+def jwt_required_async(handler):
+    """ASGI counterpart of flask_jwt_extended.jwt_required."""
+    @functools.wraps(handler)
+    async def wrapper(request: Request):
+        try:
+            access_token = get_access_token(request)
+            user_id = get_user_id_from_access_token(access_token)
+        except Exception:
+            return JSONResponse({"msg": "Invalid or missing access token"}, status_code=401)
+
+        request.state.access_token = access_token
+        request.state.user_id = user_id
+        return await handler(request)
+
+    return wrapper
+
+
+async def _json_body(request: Request):
+    try:
+        return await request.json()
+    except Exception:
+        return None
+
+
+class AgentAsyncController:
+
+    # =========================
+    # CHAT
+    # =========================
+    @staticmethod
+    @jwt_required_async
+    async def chat(request: Request):
+        data = await _json_body(request)
+        user_id = request.state.user_id
+
+        if not data or "message" not in data:
+            return JSONResponse({"error": "Message is required"}, status_code=400)
+
+        if "user_id" in data and data["user_id"] != user_id:
+            return JSONResponse({"error": "Unauthorized"}, status_code=403)
+
+        result = await AgentService.achat(
+            llm=llm,
+            user_id=user_id,
+            message=data["message"]
+        )
+        return JSONResponse(result, status_code=200)
+
+    # =========================
+    # MEAL PLAN
+    # =========================
+    @staticmethod
+    @jwt_required_async
+    async def get_meal_plan(request: Request):
+        body = await asyncio.to_thread(AgentService.get_meal_plan_json, request.state.user_id)
+        if body is None:
+            return JSONResponse({"type": "no_plan", "message": "No meal plan found"}, status_code=200)
+        return Response(body, status_code=200, media_type="application/json")
+
+    @staticmethod
+    @jwt_required_async
+    async def create_meal_plan(request: Request):
+        try:
+            goal_json = await AsyncUserProfileClient.get_ai_goal_input(
+                access_token=request.state.access_token
+            )
+            goal_dto = MealPlanProfileDTO.from_dict(goal_json)
+        except DTOValidationError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        except Exception:
+            return JSONResponse({"error": "User profile service unavailable"}, status_code=503)
+
+        result = await AgentService.acreate_meal_plan(
+            llm=llm,
+            user_id=request.state.user_id,
+            goal_input=goal_dto,
+        )
+        return JSONResponse(result, status_code=200)
+
+    # =========================
+    # WORKOUT PLAN
+    # =========================
+    @staticmethod
+    @jwt_required_async
+    async def get_workout_plan(request: Request):
+        body = await asyncio.to_thread(AgentService.get_workout_plan_json, request.state.user_id)
+        if body is None:
+            return JSONResponse({"type": "no_plan", "message": "No workout plan found"}, status_code=200)
+        return Response(body, status_code=200, media_type="application/json")
+
+    @staticmethod
+    @jwt_required_async
+    async def create_workout_plan(request: Request):
+        try:
+            profile_json = await AsyncUserProfileClient.get_ai_profile_input(
+                access_token=request.state.access_token
+            )
+            profile_dto = WorkoutPlanProfileDTO.from_dict(profile_json)
+        except DTOValidationError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        except Exception:
+            return JSONResponse({"error": "User profile service unavailable"}, status_code=503)
+
+        result = await AgentService.acreate_workout_plan(
+            llm=llm,
+            user_id=request.state.user_id,
+            profile_input=profile_dto,
+        )
+        return JSONResponse(result, status_code=200)
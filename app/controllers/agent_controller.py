@@ -1,4 +1,4 @@
-from flask import request, jsonify
+from flask import request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required
 
 from app.dto.dtos import MealPlanProfileDTO, DTOValidationError, WorkoutPlanProfileDTO
@@ -6,6 +6,7 @@ from app.llm import get_llm
 from app.services.agent_service import AgentService
 from app.clients.user_profile_client import UserProfileClient
 from app.utils.jwt_utils import get_access_token, get_user_id_from_token
+from app.utils.sse import format_sse
 
 llm = get_llm()
 
@@ -34,6 +35,38 @@ class AgentController:
         )
         return jsonify(result), 200
 
+    @staticmethod
+    @jwt_required()
+    def chat_stream():
+        data = request.get_json()
+        user_id = get_user_id_from_token()
+
+        if not data or "message" not in data:
+            return jsonify({"error": "Message is required"}), 400
+
+        if "user_id" in data and data["user_id"] != user_id:
+            return jsonify({"error": "Unauthorized"}), 403
+
+        events = AgentService.chat_stream(
+            llm=llm,
+            user_id=user_id,
+            message=data["message"]
+        )
+
+        def generate():
+            try:
+                for e in events:
+                    yield format_sse(e["event"], e["data"])
+            except Exception:
+                yield format_sse("error", {"error": "Chat stream failed"})
+
+        # stream_with_context keeps the app context (DB session) alive while streaming
+        return Response(
+            stream_with_context(generate()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
     # =========================
     # MEAL PLAN
     # =========================
@@ -41,8 +74,13 @@ class AgentController:
     @jwt_required()
     def get_meal_plan():
         user_id = get_user_id_from_token()
-        result = AgentService.get_meal_plan(user_id)
-        return jsonify(result), 200
+        body = AgentService.get_meal_plan_json(user_id)
+        if body is None:
+            return jsonify({
+                "type": "no_plan",
+                "message": "No meal plan found"
+            }), 200
+        return Response(body, status=200, mimetype="application/json")
 
     @staticmethod
     @jwt_required()
@@ -101,8 +139,13 @@ class AgentController:
     @jwt_required()
     def get_workout_plan():
         user_id = get_user_id_from_token()
-        result = AgentService.get_workout_plan(user_id)
-        return jsonify(result), 200
+        body = AgentService.get_workout_plan_json(user_id)
+        if body is None:
+            return jsonify({
+                "type": "no_plan",
+                "message": "No workout plan found"
+            }), 200
+        return Response(body, status=200, mimetype="application/json")
 
 
     @staticmethod
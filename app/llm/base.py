@@ -1,10 +1,26 @@
+import asyncio
 from abc import ABC, abstractmethod
+from typing import Iterator
 
 class BaseLLM(ABC):
     @abstractmethod
     def chat(self, system_prompt: str, user_prompt: str, temperature: float = 0.3) -> str:
         pass
 
+    def chat_stream(self, system_prompt: str, user_prompt: str, temperature: float = 0.3) -> Iterator[str]:
+        """Yield the answer as text deltas. Providers without streaming yield the full answer once."""
+        yield self.chat(system_prompt, user_prompt, temperature=temperature)
+
     def moderate(self, text: str):
         """Optional moderation hook. Return provider moderation result or None if not supported."""
-        return None
\ No newline at end of file
+        return None
+
+    # ===== ASYNC =====
+    # Default implementations run the sync call in a worker thread;
+    # providers override them with native asyncio clients.
+
+    async def achat(self, system_prompt: str, user_prompt: str, temperature: float = 0.3) -> str:
+        return await asyncio.to_thread(self.chat, system_prompt, user_prompt, temperature)
+
+    async def amoderate(self, text: str):
+        return await asyncio.to_thread(self.moderate, text)
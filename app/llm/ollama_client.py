@@ -1,3 +1,7 @@
+import json
+from typing import Iterator
+
+import httpx
 import requests
 from app.llm.base import BaseLLM
 from ..config import Config
@@ -6,24 +10,58 @@ class OllamaClient(BaseLLM):
     def __init__(self):
         self.model = Config.OLLAMA_MODEL
         self.url = Config.OLLAMA_BASE_URL
+        self._aclient: httpx.AsyncClient | None = None
 
-    def chat(self, system_prompt: str, user_prompt: str, temperature: float = 0.3) -> str:
-        payload = {
+    def _payload(self, system_prompt: str, user_prompt: str, temperature: float, stream: bool) -> dict:
+        return {
             "model": self.model,
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            "stream": False,
+            "stream": stream,
             "options": {
                 "temperature": temperature or Config.DEFAULT_TEMPERATURE
             }
         }
 
+    def chat(self, system_prompt: str, user_prompt: str, temperature: float = 0.3) -> str:
+        payload = self._payload(system_prompt, user_prompt, temperature, stream=False)
+
         response = requests.post(self.url, json=payload, timeout=120)
         response.raise_for_status()
         return response.json()["message"]["content"]
 
+    def chat_stream(self, system_prompt: str, user_prompt: str, temperature: float = 0.3) -> Iterator[str]:
+        payload = self._payload(system_prompt, user_prompt, temperature, stream=True)
+
+        # Ollama streams one JSON object per line until "done": true
+        with requests.post(self.url, json=payload, stream=True, timeout=120) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                delta = (chunk.get("message") or {}).get("content")
+                if delta:
+                    yield delta
+                if chunk.get("done"):
+                    break
+
+    async def achat(self, system_prompt: str, user_prompt: str, temperature: float = 0.3) -> str:
+        # Shared async client: connection pool is reused across in-flight requests
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(timeout=120)
+
+        payload = self._payload(system_prompt, user_prompt, temperature, stream=False)
+
+        response = await self._aclient.post(self.url, json=payload)
+        response.raise_for_status()
+        return response.json()["message"]["content"]
+
+    async def amoderate(self, text: str):
+        return None
+
     def moderate(self, text: str):
         # Ollama client: moderation not implemented — return None to signal unsupported
         return None
\ No newline at end of file
@@ -1,30 +1,60 @@
-from openai import OpenAI
+from typing import Iterator
+
+from openai import AsyncOpenAI, OpenAI
 from ..config import Config
 from .base import BaseLLM
 
 class OpenAIClient(BaseLLM):
     def __init__(self):
         self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+        self.aclient = AsyncOpenAI(api_key=Config.OPENAI_API_KEY)
         self.model = Config.OPENAI_MODEL
 
+    @staticmethod
+    def _input(system_prompt: str, user_prompt: str) -> list:
+        return [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": user_prompt
+            }
+        ]
+
     def chat(self, system_prompt: str, user_prompt: str, temperature=None) -> str:
         response = self.client.responses.create(
             model=self.model,
-            input=[
-                {
-                    "role": "system",
-                    "content": system_prompt
-                },
-                {
-                    "role": "user",
-                    "content": user_prompt
-                }
-            ],
+            input=self._input(system_prompt, user_prompt),
             # temperature=temperature or Config.DEFAULT_TEMPERATURE
         )
 
         return response.output_text
 
+    def chat_stream(self, system_prompt: str, user_prompt: str, temperature=None) -> Iterator[str]:
+        stream = self.client.responses.create(
+            model=self.model,
+            input=self._input(system_prompt, user_prompt),
+            stream=True,
+        )
+
+        try:
+            for event in stream:
+                if event.type == "response.output_text.delta":
+                    yield event.delta
+        finally:
+            # consumer stopped early (or failed): release the HTTP connection
+            stream.close()
+
+    async def achat(self, system_prompt: str, user_prompt: str, temperature=None) -> str:
+        response = await self.aclient.responses.create(
+            model=self.model,
+            input=self._input(system_prompt, user_prompt),
+        )
+
+        return response.output_text
+
     def moderate(self, text: str):
         """Use OpenAI moderation API if available. Returns moderation result dict or None."""
         try:
@@ -41,3 +71,13 @@ class OpenAIClient(BaseLLM):
             return result
         except Exception:
             return None
+
+    async def amoderate(self, text: str):
+        try:
+            res = await self.aclient.moderations.create(
+                model="omni-moderation-latest",
+                input=text
+            )
+            return res.results[0]
+        except Exception:
+            return None
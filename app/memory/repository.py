@@ -1,9 +1,15 @@
 from typing import Dict, Any, Optional
 from abc import ABC, abstractmethod
 
+from sqlalchemy import Text, func, null, or_, select, update, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
+
 from app import db
 from app.models import UserPlan
 
+PLAN_COLUMNS = ("meal_plan", "workout_plan")
+
 
 class UserStateRepository(ABC):
     """
@@ -39,10 +45,122 @@ class UserStateRepositoryImpl(UserStateRepository):
             "workout_plan": plan.workout_plan
         }
 
+    # ==============================
+    # Column-selective reads
+    # ==============================
+
+    def get_plan(self, user_id: str, column: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a single plan column (the other JSON column is not fetched)
+        """
+        plan: UserPlan | None = (
+            db.session.query(UserPlan)
+            .options(load_only(getattr(UserPlan, column)))
+            .filter(UserPlan.user_id == int(user_id))
+            .first()
+        )
+        return getattr(plan, column) if plan else None
+
+    def get_plan_json(self, user_id: str, column: str) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Raw JSON text of a stored plan entry {"plan", "start_date", "end_date"},
+        extracted in SQL so nothing is decoded / re-encoded in Python.
+
+        Returns {"plan": <json text>, "start_date": str, "end_date": str} or None.
+        """
+        table = UserPlan.__table__
+        col = table.c[column]
+        dialect = self._dialect()
+
+        def extract(path):
+            return func.json_extract(col, path, type_=Text)
+
+        def extract_str(path):
+            # MySQL JSON_EXTRACT keeps string quotes, SQLite json_extract does not
+            if dialect == "mysql":
+                return func.json_unquote(extract(path), type_=Text)
+            return extract(path)
+
+        row = db.session.execute(
+            select(
+                extract("$.plan"),
+                extract_str("$.start_date"),
+                extract_str("$.end_date"),
+            ).where(table.c.user_id == int(user_id))
+        ).first()
+
+        if not row or row[0] is None or row[0] == "null":
+            return None
+
+        plan, start, end = row
+        return {"plan": plan, "start_date": start, "end_date": end}
+
     def save_state(self, user_id: str, state: Dict[str, Any]) -> None:
         """
         UPSERT user_plans (user_id, meal_plan, workout_plan)
+        Chỉ ghi các cột có trong `state`.
+        """
+        values = {k: state[k] for k in PLAN_COLUMNS if k in state}
+        if values:
+            self.upsert_columns(user_id, values)
+
+    # ==============================
+    # Single-statement writes
+    # ==============================
+
+    @staticmethod
+    def _dialect() -> str:
+        return db.session.get_bind().dialect.name
+
+    @staticmethod
+    def _value(v):
+        # None -> SQL NULL (not the JSON literal 'null')
+        return null() if v is None else v
+
+    @staticmethod
+    def _is_empty(column, dialect: str):
+        # Older rows may hold the JSON literal null instead of SQL NULL
+        if dialect == "mysql":
+            return or_(column.is_(None), func.json_type(column) == "NULL")
+        if dialect == "sqlite":
+            return or_(column.is_(None), func.json_type(column) == "null")
+        return column.is_(None)
+
+    def upsert_columns(self, user_id: str, values: Dict[str, Any]) -> None:
+        """
+        One round-trip UPSERT on the unique user_id:
+        - MySQL:  INSERT ... ON DUPLICATE KEY UPDATE <only the given columns>
+        - SQLite: INSERT ... ON CONFLICT(user_id) DO UPDATE (tests)
+        - other dialects: SELECT then UPDATE / INSERT through the ORM
         """
+        table = UserPlan.__table__
+        dialect = self._dialect()
+        row = {"user_id": int(user_id), **{k: self._value(v) for k, v in values.items()}}
+
+        if dialect == "mysql":
+            from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+            stmt = mysql_insert(table).values(**row)
+            stmt = stmt.on_duplicate_key_update(
+                {**{k: stmt.inserted[k] for k in values}, "updated_at": func.now()}
+            )
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+            stmt = sqlite_insert(table).values(**row)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={**{k: stmt.excluded[k] for k in values}, "updated_at": func.now()},
+            )
+        else:
+            self._save_orm(user_id, values)
+            return
+
+        db.session.execute(stmt)
+        db.session.commit()
+
+    @staticmethod
+    def _save_orm(user_id: str, values: Dict[str, Any]) -> None:
         plan: UserPlan | None = (
             db.session.query(UserPlan)
             .filter(UserPlan.user_id == int(user_id))
@@ -51,18 +169,56 @@ class UserStateRepositoryImpl(UserStateRepository):
 
         if not plan:
             # INSERT
-            plan = UserPlan(
-                user_id=int(user_id),
-                meal_plan=state.get("meal_plan"),
-                workout_plan=state.get("workout_plan")
-            )
+            plan = UserPlan(user_id=int(user_id), **values)
             db.session.add(plan)
         else:
             # UPDATE
-            if "meal_plan" in state:
-                plan.meal_plan = state["meal_plan"]
+            for k, v in values.items():
+                setattr(plan, k, v)
+
+        db.session.commit()
 
-            if "workout_plan" in state:
-                plan.workout_plan = state["workout_plan"]
+    def update_column(self, user_id: str, column: str, value: Any) -> bool:
+        """
+        UPDATE one column of an existing, non-empty plan.
+        Returns False if the user has no such plan.
+        """
+        table = UserPlan.__table__
+        col = table.c[column]
 
+        result = db.session.execute(
+            update(table)
+            .where(table.c.user_id == int(user_id))
+            .where(~self._is_empty(col, self._dialect()))
+            .values({column: self._value(value), "updated_at": func.now()})
+        )
         db.session.commit()
+        return result.rowcount > 0
+
+    def insert_column_if_absent(self, user_id: str, column: str, value: Any) -> bool:
+        """
+        Set a column only if it is empty (row missing or column NULL).
+        Returns False if a plan already exists.
+        """
+        table = UserPlan.__table__
+        col = table.c[column]
+
+        # Common case: the row exists with an empty column -> one UPDATE
+        result = db.session.execute(
+            update(table)
+            .where(table.c.user_id == int(user_id))
+            .where(self._is_empty(col, self._dialect()))
+            .values({column: value, "updated_at": func.now()})
+        )
+        if result.rowcount > 0:
+            db.session.commit()
+            return True
+
+        # No row yet -> INSERT; a duplicate key means the plan already exists
+        try:
+            db.session.execute(insert(table).values(user_id=int(user_id), **{column: value}))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
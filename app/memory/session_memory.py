@@ -1,31 +1,19 @@
 # session_memory.py
-import time
 from typing import Dict, Any
 
-SESSION_TTL_SECONDS = 30 * 60  # 30 phút
-
-_session_store: Dict[str, Dict[str, Any]] = {}
+from .session_store import get_session_store
 
-
-def _now() -> float:
-    return time.time()
+SESSION_TTL_SECONDS = 30 * 60  # 30 phút
 
 
 def get_session_memory(user_id: str) -> Dict[str, Any]:
-    session = _session_store.get(user_id)
+    # Hết hạn (TTL) do store xử lý
+    return get_session_store(SESSION_TTL_SECONDS).get(str(user_id)) or {}
 
-    if not session:
-        return {}
 
-    if _now() - session["updated_at"] > SESSION_TTL_SECONDS:
-        _session_store.pop(user_id, None)
-        return {}
-
-    return session["data"]
+def update_session_memory(user_id: str, data: Dict[str, Any]) -> None:
+    get_session_store(SESSION_TTL_SECONDS).set(str(user_id), data)
 
 
-def update_session_memory(user_id: str, data: Dict[str, Any]) -> None:
-    _session_store[user_id] = {
-        "data": data,
-        "updated_at": _now(),
-    }
+def clear_session_memory(user_id: str) -> None:
+    get_session_store(SESSION_TTL_SECONDS).delete(str(user_id))
@@ -0,0 +1,172 @@
+"""
+Session stores for chat memory
+- memory: in-process, size-capped LRU with TTL and a background sweeper
+- sqlite: one SQLite file shared by every worker on the host
+- redis:  any Redis-protocol server (Redis, Valkey, KeyDB, a local stand-in)
+
+Selected with SESSION_STORE_BACKEND; values are JSON-serializable dicts.
+"""
+
+import json
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+from app.config import Config
+from app.utils.cache import TTLCache, SQLiteTTLStore
+
+
+class SessionStore(ABC):
+
+    @abstractmethod
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def set(self, user_id: str, data: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, user_id: str) -> None:
+        pass
+
+    def sweep(self) -> int:
+        """Remove expired sessions; returns how many were removed."""
+        return 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__}
+
+
+class InMemorySessionStore(SessionStore):
+
+    def __init__(self, maxsize: int, ttl: int, sweep_interval: int = 60):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, name="session.memory")
+        self._stop = threading.Event()
+
+        # Expired sessions are dropped even if the user never comes back
+        if sweep_interval > 0:
+            t = threading.Thread(
+                target=self._sweep_loop,
+                args=(sweep_interval,),
+                name="session-sweeper",
+                daemon=True,
+            )
+            t.start()
+
+    def _sweep_loop(self, interval: int) -> None:
+        while not self._stop.wait(interval):
+            self.sweep()
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(str(user_id))
+
+    def set(self, user_id: str, data: Dict[str, Any]) -> None:
+        self._cache.set(str(user_id), data)
+
+    def delete(self, user_id: str) -> None:
+        self._cache.pop(str(user_id))
+
+    def sweep(self) -> int:
+        return self._cache.purge_expired()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._cache.stats(), backend="memory")
+
+
+class SQLiteSessionStore(SessionStore):
+
+    def __init__(self, path: str, ttl: int, maxsize: int | None = None):
+        self.ttl = ttl
+        self._store = SQLiteTTLStore(path, table="chat_sessions", max_rows=maxsize)
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        raw = self._store.get(str(user_id))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, user_id: str, data: Dict[str, Any]) -> None:
+        self._store.set(str(user_id), json.dumps(data, ensure_ascii=False), ttl=self.ttl)
+
+    def delete(self, user_id: str) -> None:
+        self._store.delete(str(user_id))
+
+    def sweep(self) -> int:
+        return self._store.purge_expired()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "sqlite", "size": len(self._store)}
+
+
+class RedisSessionStore(SessionStore):
+    """Expiry is delegated to the server (SET ... EX ttl)."""
+
+    def __init__(self, url: str, ttl: int, prefix: str = "session:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("SESSION_STORE_BACKEND=redis requires the 'redis' package") from e
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.prefix}{user_id}"
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        raw = self._client.get(self._key(user_id))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, user_id: str, data: Dict[str, Any]) -> None:
+        self._client.set(self._key(user_id), json.dumps(data, ensure_ascii=False), ex=self.ttl)
+
+    def delete(self, user_id: str) -> None:
+        self._client.delete(self._key(user_id))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis"}
+
+
+# ==============================
+# Factory (singleton per process)
+# ==============================
+
+_STORE: SessionStore | None = None
+_STORE_LOCK = threading.Lock()
+
+
+def build_session_store(ttl: int) -> SessionStore:
+    backend = Config.SESSION_STORE_BACKEND.lower()
+
+    if backend == "memory":
+        return InMemorySessionStore(
+            maxsize=Config.SESSION_STORE_MAXSIZE,
+            ttl=ttl,
+            sweep_interval=Config.SESSION_SWEEP_INTERVAL,
+        )
+    if backend == "sqlite":
+        return SQLiteSessionStore(
+            Config.SESSION_STORE_PATH,
+            ttl=ttl,
+            maxsize=Config.SESSION_STORE_MAXSIZE,
+        )
+    if backend == "redis":
+        return RedisSessionStore(Config.REDIS_URL, ttl=ttl)
+
+    raise ValueError(
+        f"Unsupported SESSION_STORE_BACKEND: {Config.SESSION_STORE_BACKEND}. "
+        "Supported values: memory, sqlite, redis"
+    )
+
+
+def get_session_store(ttl: int) -> SessionStore:
+    global _STORE
+
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = build_session_store(ttl)
+    return _STORE
@@ -1,9 +1,11 @@
 from datetime import date
 import json
 from pathlib import Path
-from functools import lru_cache
 from typing import Any, Dict
 
+from app.config import Config
+from app.utils import metrics
+from app.utils.cache import TTLCache
 from .repository import UserStateRepository, UserStateRepositoryImpl
 
 # ==============================
@@ -12,6 +14,13 @@ from .repository import UserStateRepository, UserStateRepositoryImpl
 
 _repo: UserStateRepository = UserStateRepositoryImpl()
 
+# Per-user state cache (key = str(user_id)); TTL bounds staleness across workers
+_state_cache = TTLCache(
+    maxsize=Config.USER_STATE_CACHE_MAXSIZE,
+    ttl=Config.USER_STATE_CACHE_TTL,
+    name="user_state.cache",
+)
+
 _BASE_DIR = Path.cwd() / "data" / "memory"
 _BASE_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -37,13 +46,17 @@ def _to_iso(d: Any) -> Any:
 # Lazy load + cache
 # ==============================
 
-@lru_cache(maxsize=1024)
 def _load_user_state(user_id: str) -> Dict[str, Any]:
     """
-    Load state từ DB (cached)
+    Load state từ DB (cached per user)
     """
-    state = _repo.get_state(user_id)
-    return state or {}
+    key = str(user_id)
+    state = _state_cache.get(key)
+    if state is None:
+        state = _repo.get_state(user_id) or {}
+        _state_cache.set(key, state)
+    return state
+
 
 def _save_user_state(user_id: str, state: Dict[str, Any]) -> None:
     path = _user_path(user_id)
@@ -57,7 +70,7 @@ def _save_user_state(user_id: str, state: Dict[str, Any]) -> None:
         tmp.replace(path)
     finally:
         # invalidate cache cho user này
-        _load_user_state.cache_clear()
+        invalidate_user_state(user_id)
 
 
 # ==============================
@@ -76,18 +89,32 @@ def save_plan(user_id: str, plan_type: str, plan: dict, start, end) -> None:
     """
     Lưu meal_plan / workout_plan cho user
     """
-    state = _load_user_state(user_id).copy()
-
-    state[plan_type] = {
+    entry = {
         "plan": plan,
         "start_date": _to_iso(start),
         "end_date": _to_iso(end),
     }
 
-    _repo.save_state(user_id, state)
+    # Only the changed column is written, so a stale cached copy of the
+    # other plan can never overwrite the DB
+    _repo.save_state(user_id, {plan_type: entry})
+
+    # write-through cho user này
+    state = _load_user_state(user_id).copy()
+    state[plan_type] = entry
+    _state_cache.set(str(user_id), state)
+
+
+def invalidate_user_state(user_id) -> None:
+    """
+    Drop the cached state of one user (call after writing user_plans elsewhere)
+    """
+    _state_cache.pop(str(user_id))
+    metrics.incr("user_state.cache.invalidate")
+
 
-    # invalidate cache cho user này
-    _load_user_state.cache_clear()
+def user_state_cache_stats() -> Dict[str, Any]:
+    return _state_cache.stats()
 
 
 def is_plan_active(state: dict, plan_type: str) -> bool:
@@ -4,7 +4,8 @@ from sqlalchemy.dialects.mysql import JSON
 class UserPlan(db.Model):
     __tablename__ = "user_plans"
 
-    id = db.Column(db.BigInteger, primary_key=True)
+    # SQLite chỉ auto-increment với INTEGER PRIMARY KEY (tests)
+    id = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
     user_id = db.Column(db.BigInteger, nullable=False, unique=True)
 
     meal_plan = db.Column(JSON)
@@ -0,0 +1,128 @@
+"""
+Token-budgeted context packing for RAG prompts
+- adjacent chunks of the same file (chunk_id n, n+1) are merged back together
+  and the text repeated by the splitter's chunk_overlap is dropped
+- blocks are ordered by their best retrieval score
+- blocks are added until the token budget is reached (the last one is cut)
+Tokens are counted with the chat model's tiktoken encoding, len / 4 without it.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from ..config import Config
+from ..utils import metrics
+
+# The splitter overlaps chunks by 100 chars (ingest.iter_chunks); shorter
+# matches are treated as coincidence
+MAX_OVERLAP = 200
+MIN_OVERLAP = 20
+
+
+@lru_cache(maxsize=1)
+def _encoder():
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(Config.OPENAI_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # not installed / encoding file not downloadable: use the estimate
+        return None
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoder()
+    if enc is None:
+        return len(text) // 4
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    enc = _encoder()
+    if enc is None:
+        return text[:max_tokens * 4]
+    return enc.decode(enc.encode(text, disallowed_special=())[:max_tokens])
+
+
+def _overlap(a: str, b: str) -> int:
+    """Length of the longest suffix of a that is also a prefix of b."""
+    for size in range(min(len(a), len(b), MAX_OVERLAP), MIN_OVERLAP - 1, -1):
+        if a.endswith(b[:size]):
+            return size
+    return 0
+
+
+def _format(block: Dict) -> str:
+    return f"[{block['metadata'].get('source')}]\n{block['page_content']}"
+
+
+def merge_adjacent(docs: List[Dict]) -> List[Dict]:
+    """
+    Merge consecutive chunks of the same file into one block (overlap removed).
+    Each block keeps the best score of its chunks; blocks are sorted by it.
+    """
+    groups: Dict[object, List[Dict]] = {}
+    for d in docs:
+        m = d["metadata"]
+        # old index without chunk ids, or no file to group by: nothing to merge
+        key = (m.get("path") or m.get("source")) if "chunk_id" in m else None
+        if key is None:
+            key = id(d)
+        groups.setdefault(key, []).append(d)
+
+    blocks: List[Dict] = []
+    for chunks in groups.values():
+        chunks.sort(key=lambda d: d["metadata"].get("chunk_id", 0))
+        block = dict(chunks[0])
+        for d in chunks[1:]:
+            last = block["metadata"]["chunk_id"]
+            if d["metadata"]["chunk_id"] == last + 1:
+                text = d["page_content"]
+                size = _overlap(block["page_content"], text)
+                block["page_content"] += text[size:] if size else "\n" + text
+                block["metadata"] = dict(block["metadata"], chunk_id=d["metadata"]["chunk_id"])
+                block["score"] = max(block.get("score", 0.0), d.get("score", 0.0))
+            else:
+                blocks.append(block)
+                block = dict(d)
+        blocks.append(block)
+
+    blocks.sort(key=lambda b: b.get("score", 0.0), reverse=True)
+    return blocks
+
+
+def pack_context(docs: List[Dict], max_tokens: int | None = None) -> Tuple[str, List[Dict]]:
+    """
+    docs: retriever results -> (context string, blocks that made it in).
+    max_tokens: per-call budget, None -> Config.CONTEXT_MAX_TOKENS (0 = no limit)
+    """
+    max_tokens = Config.CONTEXT_MAX_TOKENS if max_tokens is None else max_tokens
+    if not docs:
+        return "", []
+
+    naive = count_tokens("\n\n".join(_format(d) for d in docs))
+
+    packed: List[Dict] = []
+    parts: List[str] = []
+    used = 0
+    for block in merge_adjacent(docs):
+        text = _format(block)
+        tokens = count_tokens(text) + (2 if parts else 0)
+        if max_tokens and used + tokens > max_tokens:
+            room = max_tokens - used - 2
+            if room >= 50:
+                parts.append(_truncate(text, room))
+                packed.append(block)
+                used = max_tokens
+            break
+        parts.append(text)
+        packed.append(block)
+        used += tokens
+
+    saved = max(naive - used, 0)
+    metrics.incr("context.tokens", used)
+    metrics.incr("context.tokens_saved", saved)
+    print(f"[context] {len(docs)} chunks -> {len(packed)} blocks, {used} tokens (saved {saved})")
+    return "\n\n".join(parts), packed
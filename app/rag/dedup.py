@@ -0,0 +1,97 @@
+"""
+Chunk deduplication for ingest
+- exact: sha256 of the chunk text (metadata["chunk_hash"])
+- near-duplicate: 64-bit SimHash over word 3-shingles, Hamming distance <= max_distance
+- first chunk seen wins (files are ingested in sorted path order)
+- every chunk is registered with the file that owns it, so ingest knows which
+  files a dropped chunk duplicated (duplicates_of)
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_BANDS = 4  # 4 x 16-bit bands: distance <= 3 guarantees one identical band
+
+
+def _tokens(text: str) -> List[str]:
+    return _WORD_RE.findall(unicodedata.normalize("NFC", text).lower())
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    tokens = _tokens(text)
+    grams = (
+        [" ".join(tokens[i:i + shingle]) for i in range(len(tokens) - shingle + 1)]
+        if len(tokens) >= shingle else tokens
+    )
+
+    weights = [0] * 64
+    for g in grams:
+        h = int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ChunkDeduplicator:
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        # chunk hash / simhash -> path of the file holding the kept copy
+        self._exact: Dict[str, Optional[str]] = {}
+        self._bands: List[Dict[int, List[Tuple[int, Optional[str]]]]] = [{} for _ in range(_BANDS)]
+        self.dropped = {"exact": 0, "near": 0}
+        # path -> files holding the kept copies of the chunks dropped from it
+        self.duplicates_of: Dict[str, Set[str]] = {}
+
+    def _band_keys(self, h: int) -> List[int]:
+        return [h >> (16 * i) & 0xFFFF for i in range(_BANDS)]
+
+    def seen(self, chunk_hash: str, h: int | None, path: str | None = None) -> None:
+        """
+        Register a chunk already in the index (e.g. from an unchanged file).
+        h=None (no simhash recorded): exact matches only.
+        """
+        self._exact.setdefault(chunk_hash, path)
+        if h is not None:
+            for band, key in zip(self._bands, self._band_keys(h)):
+                band.setdefault(key, []).append((h, path))
+
+    def duplicate_of(self, chunk_hash: str, h: int) -> Tuple[bool, Optional[str]]:
+        """(is a duplicate, path of the file holding the kept copy)"""
+        if chunk_hash in self._exact:
+            self.dropped["exact"] += 1
+            return True, self._exact[chunk_hash]
+
+        if self.max_distance > 0:
+            for band, key in zip(self._bands, self._band_keys(h)):
+                for other, path in band.get(key, ()):
+                    if hamming(h, other) <= self.max_distance:
+                        self.dropped["near"] += 1
+                        return True, path
+        return False, None
+
+    def is_duplicate(self, chunk_hash: str, h: int) -> bool:
+        return self.duplicate_of(chunk_hash, h)[0]
+
+    def filter(self, chunks: Iterable[Document]) -> Iterator[Document]:
+        """Yield only first occurrences; sets metadata["simhash"] (hex) on kept chunks."""
+        for c in chunks:
+            h = simhash(c.page_content)
+            path = c.metadata.get("path")
+            duplicate, owner = self.duplicate_of(c.metadata["chunk_hash"], h)
+            if duplicate:
+                if owner is not None and owner != path:
+                    self.duplicates_of.setdefault(path, set()).add(owner)
+                continue
+            self.seen(c.metadata["chunk_hash"], h, path)
+            c.metadata["simhash"] = f"{h:016x}"
+            yield c
@@ -0,0 +1,170 @@
+"""
+Embedding providers (shared by ingest and the Retriever)
+- openai:      OpenAIEmbeddings (text-embedding-3-small)
+- huggingface: sentence-transformers all-MiniLM-L6-v2 via HuggingFaceEmbeddings
+- onnx:        local CPU inference with onnxruntime, no network needed
+
+ONNX model dir (Config.ONNX_MODEL_DIR) = model.onnx + tokenizer.json, e.g.
+    optimum-cli export onnx --model sentence-transformers/all-MiniLM-L6-v2 data/models/all-MiniLM-L6-v2
+(a quantized model_quantized.onnx is picked up first when present)
+
+Query calls from concurrent requests are merged into one forward pass
+(dynamic batching: up to ONNX_MAX_BATCH texts or ONNX_MAX_WAIT_MS; a single
+request is never delayed).
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from queue import Empty, Queue
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ..config import Config
+from ..utils import metrics
+
+
+class OnnxEmbeddings(Embeddings):
+    def __init__(
+        self,
+        model_dir: str,
+        max_length: int = 256,
+        max_batch: int = 32,
+        max_wait_ms: float = 2.0,
+        threads: int = 0,
+    ):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_PROVIDER=onnx needs onnxruntime and tokenizers (pip install onnxruntime tokenizers)"
+            ) from e
+
+        base = Path(model_dir)
+        model = base / "model_quantized.onnx"
+        if not model.exists():
+            model = base / "model.onnx"
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(model), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(base / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        self.model = base.name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue: "Queue[tuple[str, Future]]" = Queue()
+        self._worker = threading.Thread(target=self._batch_loop, name="onnx-embed", daemon=True)
+        self._worker.start()
+
+    # ==============================
+    # Inference
+    # ==============================
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+
+        hidden = self.session.run(None, feeds)[0]  # (batch, tokens, dim)
+
+        # mean pooling over real tokens, then L2 normalize
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def _batch_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # A lone request runs immediately; when others are already queued
+            # (concurrent load), wait up to max_wait to fill the batch
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except Empty:
+                    pass
+                timeout = deadline - time.perf_counter()
+                if len(batch) == 1 or timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except Empty:
+                    break
+
+            try:
+                vectors = self._encode([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            metrics.incr("embedding.onnx.batches")
+            metrics.incr("embedding.onnx.texts", len(batch))
+            for (_, future), v in zip(batch, vectors):
+                future.set_result(v.tolist())
+
+    # ==============================
+    # Embeddings API
+    # ==============================
+
+    def embed_query(self, text: str) -> List[float]:
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for i in range(0, len(texts), self.max_batch):
+            vectors.extend(self._encode(texts[i:i + self.max_batch]).tolist())
+        return vectors
+
+    def warm_up(self) -> None:
+        """First runs allocate / optimize the graph: do it before serving."""
+        for size in (1, self.max_batch):
+            self._encode(["warm up"] * size)
+
+
+def embedding_model_name(embeddings) -> str:
+    return (
+        getattr(embeddings, "model", None)
+        or getattr(embeddings, "model_name", None)
+        or type(embeddings).__name__
+    )
+
+
+def build_embeddings(provider: str | None = None) -> Embeddings:
+    provider = provider or Config.EMBEDDING_PROVIDER
+
+    if provider == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(model="text-embedding-3-small")
+
+    if provider == "onnx":
+        return OnnxEmbeddings(
+            Config.ONNX_MODEL_DIR,
+            max_batch=Config.ONNX_MAX_BATCH,
+            max_wait_ms=Config.ONNX_MAX_WAIT_MS,
+            threads=Config.ONNX_THREADS,
+        )
+
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(
+        model_name="sentence-transformers/all-MiniLM-L6-v2",
+        encode_kwargs={"normalize_embeddings": True}
+    )
@@ -0,0 +1,152 @@
+"""
+Metadata filter compiler
+One filter dict for every backend, e.g. {"locale": "vi", "tags": {"diet": "vegan"}}
+- nested keys are flattened ("tags.diet"), None values mean "any"
+- a list value matches any of its items
+Targets:
+- Chroma: `where` clause (pre-filtered by Chroma itself)
+- numpy / FAISS: MetadataBitmapIndex -> boolean mask / row positions
+- FAISS: exact search restricted to those rows (IDSelector), callable fallback
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+_MISSING = "\x00missing"
+
+
+def flatten(metadata: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """{"tags": {"diet": "vegan"}} -> {"tags.diet": "vegan"}"""
+    flat = {}
+    for k, v in metadata.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            flat.update(flatten(v, key + "."))
+        else:
+            flat[key] = v
+    return flat
+
+
+def compile_conditions(filters: Dict[str, Any] | None) -> Dict[str, List[Any]]:
+    """Filter dict -> {flat key: [accepted values]} (unset / None keys dropped)."""
+    conditions = {}
+    for key, value in flatten(filters or {}).items():
+        if value is None:
+            continue
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        if values:
+            conditions[key] = values
+    return conditions
+
+
+def to_chroma_where(filters: Dict[str, Any] | None) -> Dict[str, Any] | None:
+    clauses = [
+        {key: {"$eq": values[0]}} if len(values) == 1 else {key: {"$in": values}}
+        for key, values in compile_conditions(filters).items()
+    ]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def to_callable(filters: Dict[str, Any] | None) -> Callable[[dict], bool] | None:
+    conditions = compile_conditions(filters)
+    if not conditions:
+        return None
+
+    def match(metadata: dict) -> bool:
+        flat = flatten(metadata)
+        return all(flat.get(key, _MISSING) in values for key, values in conditions.items())
+
+    return match
+
+
+def _category(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class MetadataBitmapIndex:
+    """
+    Per-key integer code columns over a list of metadata dicts (row order),
+    built lazily on first use of a key; a filter becomes a few vectorized
+    comparisons instead of a Python loop over every document.
+    """
+
+    def __init__(self, metadatas: List[dict]):
+        self.metadatas = metadatas
+        self._columns: Dict[str, Tuple[np.ndarray, Dict[str, int]]] = {}
+
+    def _column(self, key: str) -> Tuple[np.ndarray, Dict[str, int]]:
+        column = self._columns.get(key)
+        if column is None:
+            mapping: Dict[str, int] = {}
+            codes = np.fromiter(
+                (
+                    mapping.setdefault(_category(flatten(m).get(key, _MISSING)), len(mapping))
+                    for m in self.metadatas
+                ),
+                dtype=np.int32,
+                count=len(self.metadatas),
+            )
+            column = self._columns[key] = (codes, mapping)
+        return column
+
+    def mask(self, filters: Dict[str, Any] | None) -> np.ndarray | None:
+        """Boolean mask of matching rows, None when there is nothing to filter."""
+        conditions = compile_conditions(filters)
+        if not conditions:
+            return None
+
+        mask = np.ones(len(self.metadatas), dtype=bool)
+        for key, values in conditions.items():
+            codes, mapping = self._column(key)
+            accepted = [mapping[c] for c in map(_category, values) if c in mapping]
+            mask &= np.isin(codes, accepted)
+        return mask
+
+    def positions(self, filters: Dict[str, Any] | None) -> np.ndarray | None:
+        mask = self.mask(filters)
+        return None if mask is None else np.flatnonzero(mask).astype(np.int64)
+
+
+def faiss_search(vs, bitmaps: MetadataBitmapIndex, vector, k: int, filters: Dict[str, Any]):
+    """
+    Exact filtered top-k on a LangChain FAISS store: the flat index is only
+    searched over the rows that match (faiss IDSelectorBatch).
+    Returns [(Document, relevance score)].
+    """
+    positions = bitmaps.positions(filters)
+    if positions is None:
+        return _faiss_scored(vs, vs.similarity_search_with_score_by_vector(vector, k=k))
+    if not len(positions):
+        return []
+
+    k = min(k, len(positions))
+    try:
+        import faiss
+
+        query = np.asarray([vector], dtype=np.float32)
+        if getattr(vs, "_normalize_L2", False):
+            faiss.normalize_L2(query)
+
+        selector = faiss.IDSelectorBatch(len(positions), faiss.swig_ptr(positions))
+        distances, rows = vs.index.search(query, k, params=faiss.SearchParameters(sel=selector))
+    except (AttributeError, TypeError):
+        # faiss < 1.7.3 has no search parameters: filter every row instead (still exact)
+        return _faiss_scored(vs, vs.similarity_search_with_score_by_vector(
+            vector, k=k, filter=to_callable(filters), fetch_k=vs.index.ntotal
+        ))
+
+    docs = [
+        (vs.docstore.search(vs.index_to_docstore_id[int(row)]), float(d))
+        for d, row in zip(distances[0], rows[0])
+        if row != -1
+    ]
+    return _faiss_scored(vs, docs)
+
+
+def _faiss_scored(vs, docs_and_distances):
+    relevance = vs._select_relevance_score_fn()
+    return [(doc, relevance(d)) for doc, d in docs_and_distances]
@@ -1,7 +1,13 @@
 import argparse
+import hashlib
+import json
+import random
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, Iterator, List
 
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -9,94 +15,590 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_community.vectorstores import Chroma, FAISS
 
-from langchain_openai import OpenAIEmbeddings
-
 from ..config import Config
+from .dedup import ChunkDeduplicator
+from .embeddings import build_embeddings, embedding_model_name
+from .numpy_store import NumpyVectorStore
+from .sparse import BM25Index
+from .retriever import INDEX_VERSION_FILE, index_dir
+
+def _load_pdf(path: str, base: str) -> List[Document]:
+    """Parse one PDF into page Documents (runs in a worker process)."""
+    path, base = Path(path), Path(base)
+    loader = PyMuPDFLoader(file_path=str(path), extract_images=False)
+
+    rel = path.relative_to(base)
+    loaded = loader.load()
+    for d in loaded:
+        d.metadata |= {
+            "source": path.name,
+            "path": rel.as_posix(),
+            # data/PDF/<category>/<file>.pdf
+            "category": rel.parts[0] if len(rel.parts) > 1 else "general",
+            "file_type": "pdf"
+        }
+    return loaded
+
+
+def iter_documents(
+    data_dir: str,
+    paths: List[Path] | None = None,
+    workers: int | None = None,
+) -> Iterator[Document]:
+    """
+    Yield PDF pages file by file, as soon as each file is parsed.
+    workers > 1: files are parsed in a process pool (at most 2 * workers
+    files in flight, so the corpus is never held in memory at once).
+    Pages of one file always come out together and in order.
+    """
+    base = Path(data_dir)
+    # Only consider PDF files (recursively)
+    files = [str(p) for p in (paths if paths is not None else sorted(base.rglob("*.pdf")))]
+    workers = Config.INGEST_LOAD_WORKERS if workers is None else workers
+
+    if workers <= 1 or len(files) <= 1:
+        for f in files:
+            yield from _load_pdf(f, str(base))
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+        queue = iter(files)
+        in_flight = set()
+
+        def submit_next():
+            f = next(queue, None)
+            if f is not None:
+                in_flight.add(pool.submit(_load_pdf, f, str(base)))
+
+        for _ in range(workers * 2):
+            submit_next()
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                in_flight.discard(future)
+                submit_next()
+                yield from future.result()
+
 
-def load_documents(data_dir: str) -> List[Document]:
+def load_documents(data_dir: str, paths: List[Path] | None = None, workers: int | None = None) -> List[Document]:
     """Load only PDF files from `data_dir` using PyMuPDFLoader.
 
     This focuses the ingest process on PDFs and tags metadata accordingly.
+    `paths` restricts loading to those files (incremental ingest).
     """
-    docs: List[Document] = []
-    base = Path(data_dir)
+    return list(iter_documents(data_dir, paths, workers))
 
-    # Only consider PDF files (recursively)
-    for path in base.rglob("*.pdf"):
-        loader = PyMuPDFLoader(file_path=str(path), extract_images=False)
 
-        loaded = loader.load()
-        for d in loaded:
-            d.metadata |= {
-                "source": path.name,
-                "file_type": "pdf"
-            }
-        docs.extend(loaded)
+_VI_CHARS = set(
+    "ăâđêôơưàáảãạằắẳẵặầấẩẫậèéẻẽẹềếểễệìíỉĩịòóỏõọồốổỗộờớởỡợùúủũụừứửữựỳýỷỹỵ"
+)
 
-    return docs
 
-def chunk_documents(docs: List[Document]) -> List[Document]:
+def detect_locale(text: str) -> str:
+    """'vi' when enough letters carry Vietnamese diacritics, else 'en'."""
+    letters = [ch for ch in text.lower() if ch.isalpha()]
+    if not letters:
+        return "en"
+    vi = sum(ch in _VI_CHARS for ch in letters)
+    return "vi" if vi / len(letters) >= 0.03 else "en"
+
+
+def iter_chunks(docs: Iterable[Document]) -> Iterator[Document]:
+    """Split documents as they arrive (see iter_documents)."""
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=800,
         chunk_overlap=100
     )
 
-    chunks = splitter.split_documents(docs)
+    # chunk_id is numbered per file, so ids of other files never shift
+    counters: Dict[str, int] = {}
+    for doc in docs:
+        for c in splitter.split_documents([doc]):
+            key = c.metadata.get("path") or c.metadata.get("source")
+            c.metadata["chunk_id"] = counters.get(key, 0)
+            c.metadata["chunk_hash"] = hashlib.sha256(c.page_content.encode("utf-8")).hexdigest()
+            c.metadata["locale"] = detect_locale(c.page_content)
+            counters[key] = c.metadata["chunk_id"] + 1
+            yield c
 
-    for i, c in enumerate(chunks):
-        c.metadata["chunk_id"] = i
 
-    return chunks
+def chunk_documents(docs: List[Document]) -> List[Document]:
+    return list(iter_chunks(docs))
 
 
-def build_embeddings():
-    if Config.LLM_PROVIDER == "openai":
-        return OpenAIEmbeddings(
-            model="text-embedding-3-small"
-        )
-    else:
-        raise ValueError("Unsupported embedding provider")
+# =====================================================
+# BATCHED / RESUMABLE EMBEDDING
+# =====================================================
 
-def build_vectorstore(chunks: List[Document], embeddings):
-    if not chunks:
-        raise ValueError("No document chunks to index. Check input files or the loader.")
+CHECKPOINT_FILE = "ingest_checkpoint.json"
 
-    # Quick content sanity check
-    texts = [c.page_content for c in chunks]
-    if not any((t or "").strip() for t in texts):
-        raise ValueError("All document chunks are empty — nothing to embed.")
 
-    # Try generating a small sample embedding to detect API/config issues early
+def _count_tokens(texts: List[str]) -> int:
     try:
-        sample_emb = embeddings.embed_documents([texts[0]])
-    except Exception as e:
-        raise RuntimeError(f"Embedding generation failed: {e}") from e
-
-    if not sample_emb:
-        raise ValueError("Embedding provider returned empty embeddings. Check API keys/config.")
-
-    if Config.DB_TYPE == "chroma":
-        persist_dir = "data/chroma_db"
-        vs = Chroma.from_documents(
-            documents=chunks,
-            embedding=embeddings,
-            persist_directory=persist_dir
-        )
-        # Ensure persisted DB is written to disk
+        import tiktoken
+        enc = tiktoken.get_encoding("cl100k_base")
+        return sum(len(enc.encode(t)) for t in texts)
+    except Exception:
+        return sum(len(t) for t in texts) // 4
+
+
+def _retry_after(e: Exception) -> float | None:
+    """Seconds to wait for a rate-limit error (None = not a rate limit)."""
+    status = getattr(e, "status_code", None) or getattr(getattr(e, "response", None), "status_code", None)
+    if status != 429 and "rate limit" not in str(e).lower():
+        return None
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _embed_with_retry(embeddings, texts: List[str], max_retries: int) -> List[List[float]]:
+    for attempt in range(max_retries + 1):
         try:
-            vs.persist()
-        except Exception:
-            # Some Chroma clients persist on creation; ignore if not available
-            pass
-        return vs
-    
-    if Config.DB_TYPE == "faiss":
-        vs = FAISS.from_documents(
-            documents=chunks,
-            embedding=embeddings,
+            vectors = embeddings.embed_documents(texts)
+            if len(vectors) != len(texts):
+                raise ValueError("Embedding provider returned a wrong number of embeddings.")
+            return vectors
+        except Exception as e:
+            if attempt == max_retries:
+                raise RuntimeError(f"Embedding generation failed: {e}") from e
+            wait = _retry_after(e)
+            backoff = min(60.0, 2 ** attempt) + random.uniform(0, 1)
+            wait = max(wait or 0.0, backoff)
+            print(f"[ingest] embed batch failed ({e}); retry {attempt + 1}/{max_retries} in {wait:.1f}s")
+            time.sleep(wait)
+
+
+def _chunk_id(chunk: Document) -> str:
+    """Stable id: <file path>:<chunk number within the file>."""
+    return f"{chunk.metadata.get('path') or chunk.metadata.get('source')}:{chunk.metadata['chunk_id']}"
+
+
+def _chunk_ids(chunks: List[Document]) -> List[str]:
+    return [_chunk_id(c) for c in chunks]
+
+
+def _run_signature(ids: List[str], batch_size: int) -> str:
+    """Identifies the input of a run; a checkpoint is only resumed for the same input."""
+    h = hashlib.sha256(f"{Config.DB_TYPE}|{batch_size}".encode("utf-8"))
+    for i in ids:
+        h.update(i.encode("utf-8"))
+    return h.hexdigest()
+
+
+class _Checkpoint:
+    """Committed batch numbers of the current run, stored next to the index."""
+
+    def __init__(self, persist_dir: str, signature: str, resume: bool):
+        self.path = Path(persist_dir) / CHECKPOINT_FILE
+        self.signature = signature
+        self.done: set[int] = set()
+
+        if resume and self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("signature") == signature:
+                self.done = set(data.get("done", []))
+
+    def commit(self, batch_no: int) -> None:
+        self.done.add(batch_no)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"signature": self.signature, "done": sorted(self.done)}),
+            encoding="utf-8",
         )
-        vs.save_local("data/faiss_db")
-        return vs
+        tmp.replace(self.path)
+
+    def finish(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+class _VectorStoreWriter:
+    """Adds pre-computed embeddings to Chroma / FAISS / numpy, one batch at a time."""
+
+    def __init__(self, embeddings, load_existing: bool):
+        self.embeddings = embeddings
+        self.vs = None
+
+        if Config.DB_TYPE == "chroma":
+            self.vs = Chroma(
+                persist_directory=Config.CHROMA_DIR,
+                embedding_function=embeddings
+            )
+        elif Config.DB_TYPE == "faiss":
+            if load_existing and (Path(Config.FAISS_DIR) / "index.faiss").exists():
+                self.vs = FAISS.load_local(
+                    Config.FAISS_DIR,
+                    embeddings,
+                    allow_dangerous_deserialization=True
+                )
+        elif Config.DB_TYPE == "numpy":
+            self.vs = (
+                NumpyVectorStore.load(Config.NUMPY_DIR, embeddings)
+                if load_existing else NumpyVectorStore.empty(embeddings)
+            )
+        else:
+            raise ValueError(f"Unsupported DB_TYPE: {Config.DB_TYPE}")
+
+    def reset(self) -> None:
+        """Drop everything in the store (full rebuild)."""
+        if Config.DB_TYPE == "chroma":
+            self.vs.delete_collection()
+            self.vs = Chroma(
+                persist_directory=Config.CHROMA_DIR,
+                embedding_function=self.embeddings
+            )
+        elif Config.DB_TYPE == "numpy":
+            self.vs = NumpyVectorStore.empty(self.embeddings)
+        else:
+            self.vs = None
+
+    def delete(self, ids: List[str]) -> None:
+        if Config.DB_TYPE == "chroma":
+            self.vs._collection.delete(ids=ids)
+            return
+
+        if Config.DB_TYPE == "numpy":
+            self.vs.delete(ids)
+            self.vs.save(Config.NUMPY_DIR, quantization=Config.NUMPY_QUANTIZATION)
+            return
+
+        if self.vs is None:
+            return
+        known = set(self.vs.index_to_docstore_id.values())
+        ids = [i for i in ids if i in known]
+        if ids:
+            self.vs.delete(ids)
+            self.vs.save_local(Config.FAISS_DIR)
+
+    def add(self, chunks: List[Document], ids: List[str], vectors: List[List[float]]) -> None:
+        texts = [c.page_content for c in chunks]
+        metadatas = [c.metadata for c in chunks]
+
+        if Config.DB_TYPE == "chroma":
+            # upsert by id: re-running a batch after a crash does not duplicate it
+            self.vs._collection.upsert(
+                ids=ids,
+                embeddings=vectors,
+                metadatas=metadatas,
+                documents=texts,
+            )
+            return
+
+        pairs = list(zip(texts, vectors))
+        if Config.DB_TYPE == "numpy":
+            self.vs.add_embeddings(pairs, metadatas=metadatas, ids=ids)
+            self.vs.save(Config.NUMPY_DIR, quantization=Config.NUMPY_QUANTIZATION)
+            return
+
+        if self.vs is None:
+            self.vs = FAISS.from_embeddings(pairs, self.embeddings, metadatas=metadatas, ids=ids)
+        else:
+            # upsert: replace chunks that are already in the index
+            existing = set(self.vs.index_to_docstore_id.values())
+            replace = [i for i in ids if i in existing]
+            if replace:
+                self.vs.delete(replace)
+            self.vs.add_embeddings(pairs, metadatas=metadatas, ids=ids)
+        self.vs.save_local(Config.FAISS_DIR)
+
+
+def _batches(chunks: Iterable[Document], batch_size: int) -> Iterator[tuple]:
+    """(batch number, chunks, ids), built as the chunks arrive."""
+    batch: List[Document] = []
+    n = 0
+    for c in chunks:
+        if not (c.page_content or "").strip():
+            continue
+        batch.append(c)
+        if len(batch) == batch_size:
+            yield n, batch, _chunk_ids(batch)
+            batch, n = [], n + 1
+    if batch:
+        yield n, batch, _chunk_ids(batch)
+
+
+def build_vectorstore(
+    chunks: Iterable[Document],
+    embeddings,
+    batch_size: int | None = None,
+    workers: int | None = None,
+    resume: bool = True,
+    writer: "_VectorStoreWriter | None" = None,
+    signature: str | None = None,
+    allow_empty: bool = False,
+):
+    """
+    Embed chunks in batches (bounded concurrency, retry on rate limits) and
+    write each batch to the vector store as soon as it is ready.
+    `chunks` may be a stream: at most 2 * workers batches are held in memory.
+    Committed batches are checkpointed, so an interrupted run resumes; a
+    stream needs a `signature` identifying its input (a list is hashed by id).
+    """
+    batch_size = batch_size or Config.INGEST_BATCH_SIZE
+    workers = workers or Config.INGEST_WORKERS
+
+    if signature is None:
+        chunks = list(chunks)
+        signature = _run_signature(_chunk_ids(chunks), batch_size)
+
+    checkpoint = _Checkpoint(index_dir(), signature, resume)
+    writer = writer or _VectorStoreWriter(embeddings, load_existing=bool(checkpoint.done))
+    if checkpoint.done:
+        print(f"[ingest] resuming: {len(checkpoint.done)} batches already committed")
+
+    n_batches = n_chunks = n_tokens = 0
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as pool:
+        # At most 2 * workers batches in flight: memory stays bounded
+        queue = _batches(chunks, batch_size)
+        in_flight = {}
+
+        def submit_next():
+            nonlocal n_batches
+            for batch in queue:
+                n_batches += 1
+                if batch[0] in checkpoint.done:
+                    continue
+                texts = [c.page_content for c in batch[1]]
+                in_flight[pool.submit(_embed_with_retry, embeddings, texts, Config.INGEST_MAX_RETRIES)] = batch
+                return
+
+        for _ in range(workers * 2):
+            submit_next()
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch_no, batch_chunks, batch_ids = in_flight.pop(future)
+                writer.add(batch_chunks, batch_ids, future.result())
+                checkpoint.commit(batch_no)
+
+                n_chunks += len(batch_chunks)
+                n_tokens += _count_tokens([c.page_content for c in batch_chunks])
+                submit_next()
+
+            elapsed = time.perf_counter() - start
+            print(
+                f"[ingest] {len(checkpoint.done)} batches committed | "
+                f"{n_chunks / elapsed:.1f} chunks/s | {n_tokens / elapsed:.0f} tokens/s"
+            )
+
+    if not n_batches and not allow_empty:
+        raise ValueError("No document chunks to index. Check input files or the loader.")
+
+    checkpoint.finish()
+    elapsed = time.perf_counter() - start
+    if n_chunks:
+        print(
+            f"[ingest] embedded {n_chunks} chunks ({n_tokens} tokens) in {elapsed:.1f}s: "
+            f"{n_chunks / elapsed:.1f} chunks/s, {n_tokens / elapsed:.0f} tokens/s"
+        )
+
+    if writer.vs is None:
+        writer.vs = FAISS.load_local(Config.FAISS_DIR, embeddings, allow_dangerous_deserialization=True)
+    return writer.vs
+
+
+# =====================================================
+# INCREMENTAL INGEST (MANIFEST)
+# =====================================================
+
+MANIFEST_FILE = "ingest_manifest.json"
+# Bump when chunk metadata changes: every chunk is rewritten on the next run
+MANIFEST_SCHEMA = 3
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_manifest(persist_dir: str) -> dict:
+    """
+    {"files": {path: {"sha256": str, "chunks": {chunk id: sha256}, "simhash": {chunk id: hex},
+                      "duplicates_of": [paths holding the kept copies of chunks dropped by dedup]}}}
+    """
+    path = Path(persist_dir) / MANIFEST_FILE
+    if not path.exists():
+        return {"files": {}}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_manifest(persist_dir: str, manifest: dict) -> None:
+    path = Path(persist_dir) / MANIFEST_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+def _with_dependents(changed: list, removed: list, known: dict, current: dict) -> list:
+    """
+    Add the unchanged files whose chunks were dropped as duplicates of a
+    changed / removed file: the kept copy may be gone, so they are re-chunked
+    (their chunks keep their hashes: nothing is re-embedded).
+    Entries written before duplicates_of was recorded count as dependent.
+    """
+    affected = set(changed) | set(removed)
+    if not affected:
+        return changed
+
+    def depends(entry: dict) -> bool:
+        if "duplicates_of" not in entry:
+            return True
+        return bool(affected.intersection(entry["duplicates_of"]))
+
+    while True:
+        extra = {rel for rel in current if rel not in affected and depends(known.get(rel, {}))}
+        if not extra:
+            break
+        affected |= extra
+    return [rel for rel in current if rel in affected]
+
+
+def ingest_directory(
+    data_dir: str,
+    embeddings,
+    batch_size: int | None = None,
+    workers: int | None = None,
+    resume: bool = True,
+    full: bool = False,
+    load_workers: int | None = None,
+):
+    """
+    Bring the index in line with `data_dir`:
+    - new / changed PDFs are re-chunked; only chunks whose id or content
+      changed are re-embedded
+    - chunks of deleted PDFs (and leftover chunks of shrunk ones) are removed
+    - the BM25 index is updated the same way
+    Returns the vector store, or None when nothing changed.
+    """
+    persist_dir = index_dir()
+    base = Path(data_dir)
+    manifest = {"files": {}} if full else load_manifest(persist_dir)
+    model = embedding_model_name(embeddings)
+    if manifest.get("schema") != MANIFEST_SCHEMA or manifest.get("embedding_model", model) != model:
+        if manifest["files"]:
+            print("[ingest] chunk metadata or embedding model changed, rewriting every chunk")
+        # keep the chunk ids (stale ones still get deleted) but reuse nothing
+        manifest = {"files": {
+            rel: {"sha256": None, "chunks": dict.fromkeys(entry.get("chunks", {}))}
+            for rel, entry in manifest["files"].items()
+        }}
+    manifest["schema"] = MANIFEST_SCHEMA
+    manifest["embedding_model"] = model
+    known = manifest["files"]
+
+    current = {p.relative_to(base).as_posix(): p for p in sorted(base.rglob("*.pdf"))}
+    hashes = {rel: file_sha256(p) for rel, p in current.items()}
+
+    changed = [rel for rel in current if known.get(rel, {}).get("sha256") != hashes[rel]]
+    removed = [rel for rel in known if rel not in current]
+    changed = _with_dependents(changed, removed, known, current)
+    if not changed and not removed and not full:
+        print("[ingest] index is up to date")
+        return None
+    print(f"[ingest] {len(changed)} new/changed, {len(removed)} removed, "
+          f"{len(current) - len(changed)} unchanged files")
+
+    chunks = iter_chunks(
+        iter_documents(data_dir, [current[rel] for rel in changed], workers=load_workers)
+    )
+    dedup = None
+    if Config.INGEST_DEDUP:
+        # chunks of unchanged files stay in the index: new copies of them are dropped
+        dedup = ChunkDeduplicator(max_distance=Config.INGEST_SIMHASH_DISTANCE)
+        for rel, entry in known.items():
+            if rel in current and rel not in changed:
+                simhashes = entry.get("simhash", {})
+                for cid, chunk_hash in entry.get("chunks", {}).items():
+                    h = simhashes.get(cid)
+                    dedup.seen(chunk_hash, int(h, 16) if h else None, rel)
+        chunks = dedup.filter(chunks)
+
+    old_chunks = {
+        cid: h
+        for rel in changed + removed
+        for cid, h in known.get(rel, {}).get("chunks", {}).items()
+    }
+    for rel in removed:
+        known.pop(rel, None)
+    for rel in changed:
+        known[rel] = {"sha256": hashes[rel], "chunks": {}, "simhash": {}, "duplicates_of": []}
+
+    writer = _VectorStoreWriter(embeddings, load_existing=not full)
+    if full:
+        # the store is wiped: batches committed by an earlier run are gone too
+        writer.reset()
+        resume = False
+    sparse = (None if full else BM25Index.load(persist_dir)) or BM25Index()
+
+    # Streamed: ids / manifest entries / BM25 docs are recorded as chunks pass by
+    new_ids: set = set()
+    counts = {"chunks": 0, "embedded": 0}
+
+    def to_embed():
+        for c in chunks:
+            cid = _chunk_id(c)
+            new_ids.add(cid)
+            counts["chunks"] += 1
+            entry = known[c.metadata["path"]]
+            entry["chunks"][cid] = c.metadata["chunk_hash"]
+            if "simhash" in c.metadata:
+                entry["simhash"][cid] = c.metadata["simhash"]
+            if old_chunks.get(cid) == c.metadata["chunk_hash"]:
+                continue
+            counts["embedded"] += 1
+            sparse.upsert([cid], [c.page_content], [c.metadata], build=False)
+            yield c
+
+    signature = _run_signature(
+        [f"{rel}@{hashes[rel]}" for rel in changed] + [f"-{rel}" for rel in removed],
+        batch_size or Config.INGEST_BATCH_SIZE,
+    )
+    build_vectorstore(
+        to_embed(), embeddings,
+        batch_size=batch_size, workers=workers, resume=resume, writer=writer,
+        signature=signature, allow_empty=True,
+    )
+    print(f"[ingest] {counts['embedded']}/{counts['chunks']} chunks of changed files were new or modified")
+    if dedup is not None:
+        print(f"[ingest] dropped {dedup.dropped['exact']} exact / {dedup.dropped['near']} near-duplicate chunks")
+        for rel, owners in dedup.duplicates_of.items():
+            known[rel]["duplicates_of"] = sorted(owners)
+
+    # Deleted after the adds: stale ids are never among the new ones
+    stale = sorted(set(old_chunks) - new_ids)
+    if stale:
+        print(f"[ingest] removing {len(stale)} stale chunks")
+        writer.delete(stale)
+
+    # Sparse (BM25) index next to the vector store (one rebuild)
+    sparse.delete(stale)
+    sparse.save(persist_dir)
+    save_manifest(persist_dir, manifest)
+
+    if writer.vs is None:
+        writer.vs = FAISS.load_local(Config.FAISS_DIR, embeddings, allow_dangerous_deserialization=True)
+    return writer.vs
+
+
+def write_index_version(persist_dir: str) -> str:
+    """New stamp after every build: invalidates retrieval caches keyed on it."""
+    version = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    path = Path(persist_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    (path / INDEX_VERSION_FILE).write_text(version, encoding="utf-8")
+    return version
+
 
 def verify(vs):
     if hasattr(vs, "_collection"):
@@ -116,15 +618,26 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Ingest PDFs into Chroma vectorstore")
     parser.add_argument("--data-dir", default="data/PDF", help="Directory containing PDF files")
+    parser.add_argument("--batch-size", type=int, default=Config.INGEST_BATCH_SIZE, help="Chunks per embedding request")
+    parser.add_argument("--workers", type=int, default=Config.INGEST_WORKERS, help="Concurrent embedding requests")
+    parser.add_argument("--fresh", action="store_true", help="Ignore any checkpoint of an interrupted run")
+    parser.add_argument("--load-workers", type=int, default=Config.INGEST_LOAD_WORKERS, help="Processes parsing PDFs")
+    parser.add_argument("--full", action="store_true", help="Rebuild the whole index, ignoring the manifest")
     args = parser.parse_args()
 
-    docs = load_documents(args.data_dir)
-    if not docs:
+    if not any(Path(args.data_dir).rglob("*.pdf")):
         raise SystemExit(f"No PDFs found in {args.data_dir}")
 
-    chunks = chunk_documents(docs)
-
     embeddings = build_embeddings()
-    vs = build_vectorstore(chunks, embeddings)
-
-    verify(vs)
+    vs = ingest_directory(
+        args.data_dir,
+        embeddings,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        resume=not args.fresh,
+        full=args.full,
+        load_workers=args.load_workers,
+    )
+    if vs is not None:
+        print("Index version:", write_index_version(index_dir()))
+        verify(vs)
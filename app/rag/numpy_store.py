@@ -0,0 +1,256 @@
+"""
+Pure-NumPy vector store (DB_TYPE=numpy)
+- vectors.npy: L2-normalized float32 matrix, opened with mmap_mode="r"
+  (loads in milliseconds, pages shared by every gunicorn worker)
+- docs.json: ids / texts / metadatas sidecar
+- every save writes a new generation directory (gen-*) holding all the files,
+  then swaps the CURRENT pointer: a reader never pairs docs.json and
+  vectors.npy from different saves
+- exact top-k: one matrix-vector product + argpartition
+- metadata filters are evaluated as boolean masks (filters.MetadataBitmapIndex)
+- optional compact first pass (NUMPY_QUANTIZATION=int8): the scan runs over an
+  int8 copy (1/4 of the float32 size, written only in that mode) and only the
+  best candidates are re-scored with the float32 rows, read lazily from the mmap
+"""
+
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .filters import MetadataBitmapIndex
+
+VECTORS_FILE = "vectors.npy"
+DOCS_FILE = "docs.json"
+# name of the generation directory readers should open
+CURRENT_FILE = "CURRENT"
+GENERATION_PREFIX = "gen-"
+# mode -> (quantized matrix, per-row scales) written next to vectors.npy
+QUANTIZED_FILES = {
+    "int8": ("vectors_int8.npy", "vectors_int8_scale.npy"),
+}
+
+# Rows converted to float32 at a time during the quantized scan
+_SCAN_BLOCK = 8192
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8: v ~= q * scale."""
+    scale = np.abs(vectors).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    q = np.round(vectors / scale[:, None]).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+class NumpyVectorStore:
+    def __init__(self, embeddings, vectors: np.ndarray, ids: List[str], texts: List[str], metadatas: List[dict]):
+        if len(vectors) != len(ids):
+            raise ValueError(f"vectors ({len(vectors)}) and docs ({len(ids)}) are out of sync")
+        self.embeddings = embeddings
+        self.vectors = vectors
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.bitmaps = MetadataBitmapIndex(metadatas)
+        # int8 first-pass copy and its row scales, see load()
+        self.quantized: np.ndarray | None = None
+        self.scales: np.ndarray | None = None
+        self.rerank_factor = 4
+
+    # ==============================
+    # Load / save
+    # ==============================
+
+    @classmethod
+    def empty(cls, embeddings) -> "NumpyVectorStore":
+        return cls(embeddings, np.zeros((0, 0), dtype=np.float32), [], [], [])
+
+    @staticmethod
+    def _current_dir(base: Path) -> Path | None:
+        """Directory of the last complete save (flat layout of older saves as fallback)."""
+        pointer = base / CURRENT_FILE
+        if pointer.exists():
+            return base / pointer.read_text(encoding="utf-8").strip()
+        if (base / VECTORS_FILE).exists():
+            return base
+        return None
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        embeddings,
+        quantization: str | None = None,
+        rerank_factor: int = 4,
+    ) -> "NumpyVectorStore":
+        base = Path(path)
+        for attempt in range(3):
+            current = cls._current_dir(base)
+            if current is None:
+                return cls.empty(embeddings)
+            try:
+                return cls._load_dir(current, embeddings, quantization, rerank_factor)
+            except FileNotFoundError:
+                # pruned by a concurrent save between reading CURRENT and opening
+                if attempt == 2:
+                    raise
+
+    @classmethod
+    def _load_dir(cls, current: Path, embeddings, quantization: str | None, rerank_factor: int):
+        vectors = np.load(current / VECTORS_FILE, mmap_mode="r")
+        docs = json.loads((current / DOCS_FILE).read_text(encoding="utf-8"))
+        store = cls(embeddings, vectors, docs["ids"], docs["texts"], docs["metadatas"])
+        store.rerank_factor = rerank_factor
+
+        files = QUANTIZED_FILES.get(quantization or "")
+        if files and (current / files[0]).exists():
+            store.quantized = np.load(current / files[0], mmap_mode="r")
+            store.scales = np.load(current / files[1])
+        return store
+
+    def save(self, path: str, quantization: str | None = None) -> None:
+        """
+        Write a new generation directory, then point CURRENT at it.
+        quantization: also write the first-pass copy of that mode (QUANTIZED_FILES).
+        Readers keep their mmap of the old files; generations older than the
+        previous one are removed.
+        """
+        base = Path(path)
+        base.mkdir(parents=True, exist_ok=True)
+        name = f"{GENERATION_PREFIX}{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        target = base / name
+        target.mkdir()
+
+        with open(target / VECTORS_FILE, "wb") as f:
+            np.save(f, np.ascontiguousarray(self.vectors, dtype=np.float32))
+        (target / DOCS_FILE).write_text(
+            json.dumps(
+                {"ids": self.ids, "texts": self.texts, "metadatas": self.metadatas},
+                ensure_ascii=False,
+            ),
+            encoding="utf-8",
+        )
+        files = QUANTIZED_FILES.get(quantization or "")
+        if files:
+            vectors = np.asarray(self.vectors, dtype=np.float32)
+            q8, scale = quantize_int8(vectors) if len(vectors) else (vectors.astype(np.int8), np.zeros(0, np.float32))
+            for file_name, array in zip(files, (q8, scale)):
+                with open(target / file_name, "wb") as f:
+                    np.save(f, array)
+
+        previous = self._current_dir(base)
+        pointer = base / (CURRENT_FILE + ".tmp")
+        pointer.write_text(name, encoding="utf-8")
+        os.replace(pointer, base / CURRENT_FILE)
+        self._prune(base, keep={name, previous.name if previous is not None else None})
+
+    @staticmethod
+    def _prune(base: Path, keep: set) -> None:
+        for old in base.glob(GENERATION_PREFIX + "*"):
+            if old.name not in keep:
+                shutil.rmtree(old, ignore_errors=True)
+        # flat files of saves made before generation directories
+        for old in [*base.glob("vectors*.npy"), base / DOCS_FILE]:
+            old.unlink(missing_ok=True)
+
+    # ==============================
+    # Writes (ingest)
+    # ==============================
+
+    def add_embeddings(self, pairs, metadatas: List[dict], ids: List[str]) -> None:
+        """Upsert by id."""
+        pairs = list(pairs)
+        new = _normalize(np.asarray([v for _, v in pairs], dtype=np.float32))
+
+        replace = set(ids) & set(self.ids)
+        if replace:
+            self.delete(list(replace))
+
+        self.vectors = new if not len(self.vectors) else np.vstack([self.vectors, new])
+        self.ids += list(ids)
+        self.texts += [t for t, _ in pairs]
+        self.metadatas += list(metadatas)
+        self.bitmaps = MetadataBitmapIndex(self.metadatas)
+
+    def delete(self, ids: List[str]) -> None:
+        drop = set(ids)
+        keep = [i for i, cid in enumerate(self.ids) if cid not in drop]
+        self.vectors = np.asarray(self.vectors)[keep]
+        self.ids = [self.ids[i] for i in keep]
+        self.texts = [self.texts[i] for i in keep]
+        self.metadatas = [self.metadatas[i] for i in keep]
+        self.bitmaps = MetadataBitmapIndex(self.metadatas)
+
+    # ==============================
+    # Search
+    # ==============================
+
+    def search_by_vector(self, vector, k: int, filters: Dict[str, Any] | None = None) -> List[Tuple[int, float]]:
+        if not self.ids:
+            return []
+
+        q = _normalize(np.asarray(vector, dtype=np.float32))
+        mask = self.bitmaps.mask(filters)
+
+        if self.quantized is None:
+            return self._top_k(self.vectors @ q, k, mask)
+
+        # 1st pass on the compact copy, then exact float32 scores for the candidates
+        candidates = self._top_k(self._approx_scores(q), k * self.rerank_factor, mask)
+        rows = np.sort(np.fromiter((i for i, _ in candidates), dtype=np.int64))
+        if not len(rows):
+            return []
+        exact = np.asarray(self.vectors[rows], dtype=np.float32) @ q
+        order = np.argsort(-exact)[:k]
+        return [(int(rows[i]), float(exact[i])) for i in order]
+
+    def _approx_scores(self, q: np.ndarray) -> np.ndarray:
+        scores = np.empty(len(self.quantized), dtype=np.float32)
+        for start in range(0, len(scores), _SCAN_BLOCK):
+            block = self.quantized[start:start + _SCAN_BLOCK].astype(np.float32)
+            np.dot(block, q, out=scores[start:start + _SCAN_BLOCK])
+        scores *= self.scales
+        return scores
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int, mask: np.ndarray | None) -> List[Tuple[int, float]]:
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+            k = min(k, int(mask.sum()))
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def similarity_search_with_relevance_scores(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Dict[str, Any] | None = None,
+    ) -> List[Tuple[Document, float]]:
+        vector = self.embeddings.embed_query(query)
+        return [
+            (Document(page_content=self.texts[i], metadata=self.metadatas[i]), score)
+            for i, score in self.search_by_vector(vector, k, filter)
+        ]
+
+    def similarity_search(self, query: str, k: int = 4, filter: Dict[str, Any] | None = None) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_relevance_scores(query, k, filter)]
+
+    def __len__(self) -> int:
+        return len(self.ids)
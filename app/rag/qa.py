@@ -1,10 +1,11 @@
-from app.rag.retriever import Retriever
+from app.rag.registry import get_retriever
+from app.rag.context import pack_context
 from app.llm.factory import get_llm
 from app.agent.prompts import SYSTEM_PROMPT
 from app.agent.schemas import OUTPUT_SCHEMA
 
 def generate_plan(user_profile: dict, request: str):
-    retriever = Retriever()
+    retriever = get_retriever()
 
     expanded_query = f"""
     {request}
@@ -26,10 +27,7 @@ def generate_plan(user_profile: dict, request: str):
         filters=filters
     )
 
-    context = "\n\n".join(
-        f"[{d['metadata'].get('source')}]\n{d['page_content']}"
-        for d in docs
-    )
+    context, _ = pack_context(docs)
 
     prompt = f"""
     {SYSTEM_PROMPT}
@@ -62,7 +60,7 @@ def answer_query(query: str, user_profile: dict | None = None, k: int = 5, filte
 
     Returns dict: {"answer": str, "sources": [..]} suitable for agent responses.
     """
-    retriever = Retriever()
+    retriever = get_retriever()
 
     expanded_query = query
     if user_profile:
@@ -71,10 +69,7 @@ def answer_query(query: str, user_profile: dict | None = None, k: int = 5, filte
 
     docs = retriever.retrieve(expanded_query, k=k, filters=filters)
 
-    context = "\n\n".join(
-        f"[{d['metadata'].get('source')}]\n{d['page_content']}"
-        for d in docs
-    )
+    context, _ = pack_context(docs)
 
     prompt = f"""
     {SYSTEM_PROMPT}
@@ -0,0 +1,127 @@
+"""
+Shared Retriever registry
+- One Retriever per process (embeddings + vector store loaded once)
+- Thread-safe lazy load / warm-up
+- Hot-reload when the index directory changes on disk (re-ingest)
+- Load times reported to app.utils.metrics ("retriever.load")
+"""
+
+import os
+import threading
+import time
+
+from app.config import Config
+from app.rag.retriever import Retriever, index_dir
+from app.utils import metrics
+
+
+def _index_mtime(path: str) -> float:
+    """Latest mtime of the index directory and its top-level files (0 if missing)."""
+    try:
+        mtime = os.stat(path).st_mtime
+        with os.scandir(path) as it:
+            for entry in it:
+                mtime = max(mtime, entry.stat().st_mtime)
+        return mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+class RetrieverRegistry:
+    def __init__(self, reload_interval: float = 30.0):
+        self.reload_interval = reload_interval
+        self._retriever: Retriever | None = None
+        self._mtime = 0.0
+        self._checked_at = 0.0
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        """Build a new Retriever and swap it in (caller holds the lock)."""
+        path = index_dir()
+        mtime = _index_mtime(path)
+
+        start = time.perf_counter()
+        # Reuse the embedding model on reload, only the vector store is reopened
+        embeddings = self._retriever.embeddings if self._retriever else None
+        retriever = Retriever(embeddings=embeddings)
+        elapsed = time.perf_counter() - start
+
+        metrics.observe("retriever.load", elapsed)
+        metrics.incr("retriever.reload" if self._retriever else "retriever.initial_load")
+        print(f"[retriever] loaded {Config.DB_TYPE} index from {path} in {elapsed * 1000:.0f} ms")
+
+        self._retriever = retriever
+        self._mtime = mtime
+        self._loaded_at = self._checked_at = time.time()
+
+    def get(self) -> Retriever:
+        retriever = self._retriever
+        if retriever is not None and not self._should_check():
+            return retriever
+
+        with self._lock:
+            if self._retriever is None:
+                self._load()
+            elif self._should_check():
+                self._checked_at = time.time()
+                if _index_mtime(index_dir()) > self._mtime:
+                    try:
+                        self._load()
+                    except Exception as e:
+                        # e.g. ingest still writing: keep serving the old index
+                        metrics.incr("retriever.reload_failed")
+                        print(f"[retriever] reload failed, keeping current index: {e}")
+            return self._retriever
+
+    def _should_check(self) -> bool:
+        return bool(self.reload_interval) and time.time() - self._checked_at >= self.reload_interval
+
+    def warm_up(self) -> None:
+        """Load the index and embed one query so the first request pays nothing."""
+        start = time.perf_counter()
+        retriever = self.get()
+        if Config.HYBRID_SEARCH:
+            retriever.sparse
+        # local models (onnx) also warm up their batch shapes
+        inner = getattr(retriever.embeddings, "inner", retriever.embeddings)
+        if hasattr(inner, "warm_up"):
+            inner.warm_up()
+        retriever.embeddings.embed_query("warm up")
+        metrics.observe("retriever.warm_up", time.perf_counter() - start)
+
+    def reload(self) -> Retriever:
+        with self._lock:
+            self._load()
+            return self._retriever
+
+    def stats(self) -> dict:
+        embeddings = self._retriever.embeddings if self._retriever else None
+        return {
+            "loaded": self._retriever is not None,
+            "db_type": Config.DB_TYPE,
+            "index_dir": index_dir(),
+            "index_mtime": self._mtime or None,
+            "loaded_at": self._loaded_at,
+            "reload_interval_s": self.reload_interval,
+            "query_embeddings": embeddings.stats() if hasattr(embeddings, "stats") else None,
+        }
+
+
+_registry = RetrieverRegistry(reload_interval=Config.RETRIEVER_RELOAD_INTERVAL)
+
+
+def get_registry() -> RetrieverRegistry:
+    return _registry
+
+
+def get_retriever() -> Retriever:
+    return _registry.get()
+
+
+def warm_up_retriever() -> None:
+    """Called from create_app; a missing index must not stop the app."""
+    try:
+        _registry.warm_up()
+    except Exception as e:
+        print(f"[retriever] warm-up failed: {e}")
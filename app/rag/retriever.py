@@ -1,10 +1,22 @@
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
 from typing import Dict, Any, List
 
+import numpy as np
+from langchain_core.embeddings import Embeddings
 from langchain_community.vectorstores import Chroma, FAISS
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.embeddings import HuggingFaceEmbeddings
 
 from ..config import Config
+from .embeddings import build_embeddings, embedding_model_name
+from .filters import MetadataBitmapIndex, faiss_search, to_chroma_where
+from .numpy_store import NumpyVectorStore
+from .sparse import BM25Index, rrf_fuse
+from ..utils import metrics
+from ..utils.cache import TTLCache, SQLiteTTLStore
 
 
 def _metadata_bonus(metadata: Dict, filters: Dict) -> float:
@@ -24,41 +36,239 @@ def _metadata_bonus(metadata: Dict, filters: Dict) -> float:
     return bonus
 
 
-class Retriever:
-    def __init__(self):
-        self.embeddings = (
-            OpenAIEmbeddings(model="text-embedding-3-small")
-            if Config.EMBEDDING_PROVIDER == "openai"
-            else HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-MiniLM-L6-v2",
-                encode_kwargs={"normalize_embeddings": True}
-            )
+# =====================================================
+# QUERY EMBEDDING CACHE
+# =====================================================
+
+def _normalize_query(text: str) -> str:
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings object and caches embed_query results.
+    - key: model name + normalized query text
+    - in-memory LRU, optionally backed by a SQLite file (float32 blobs)
+    - embed_documents (ingest) is passed through untouched
+    """
+
+    def __init__(self, inner: Embeddings, maxsize: int = 2048, store: SQLiteTTLStore | None = None):
+        self.inner = inner
+        self.model = embedding_model_name(inner)
+        self._memory = TTLCache(maxsize=maxsize, name="embedding.cache.memory")
+        self._store = store
+
+    def _key(self, text: str) -> str:
+        payload = f"{self.model}\n{_normalize_query(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+
+        vector = self._memory.get(key)
+        if vector is None and self._store is not None:
+            blob = self._store.get(key)
+            if blob is not None:
+                vector = np.frombuffer(blob, dtype=np.float32).tolist()
+                self._memory.set(key, vector)
+
+        if vector is not None:
+            metrics.incr("embedding.cache.hit")
+            return vector
+
+        metrics.incr("embedding.cache.miss")
+        start = time.perf_counter()
+        vector = self.inner.embed_query(text)
+        metrics.observe("embedding.query", time.perf_counter() - start)
+
+        self._memory.set(key, vector)
+        if self._store is not None:
+            self._store.set(key, np.asarray(vector, dtype=np.float32).tobytes())
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    def stats(self) -> dict:
+        return dict(
+            self._memory.stats(),
+            model=self.model,
+            persistent=len(self._store) if self._store is not None else None,
         )
 
+
+def build_query_embeddings(inner: Embeddings) -> Embeddings:
+    if not Config.EMBEDDING_CACHE_ENABLED:
+        return inner
+
+    store = None
+    if Config.EMBEDDING_CACHE_BACKEND == "sqlite":
+        store = SQLiteTTLStore(
+            Config.EMBEDDING_CACHE_PATH,
+            table="query_embeddings",
+            max_rows=Config.EMBEDDING_CACHE_MAXSIZE * 10,
+        )
+    return CachedEmbeddings(inner, maxsize=Config.EMBEDDING_CACHE_MAXSIZE, store=store)
+
+
+def index_dir() -> str:
+    """On-disk location of the configured vector store."""
+    return {
+        "chroma": Config.CHROMA_DIR,
+        "numpy": Config.NUMPY_DIR,
+    }.get(Config.DB_TYPE, Config.FAISS_DIR)
+
+
+# =====================================================
+# RETRIEVAL RESULT CACHE
+# =====================================================
+
+# Written by app.rag.ingest after every successful build
+INDEX_VERSION_FILE = "index_version"
+
+_results = TTLCache(
+    maxsize=Config.RETRIEVAL_CACHE_MAXSIZE,
+    ttl=Config.RETRIEVAL_CACHE_TTL or None,
+    name="retrieval.cache",
+)
+
+
+def read_index_version(path: str) -> str:
+    """Version stamp of an index dir (falls back to its mtime for old indexes)."""
+    try:
+        with open(os.path.join(path, INDEX_VERSION_FILE), encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        try:
+            return f"mtime:{os.stat(path).st_mtime}"
+        except FileNotFoundError:
+            return "missing"
+
+
+def clear_retrieval_cache() -> None:
+    _results.clear()
+
+
+def _unique_content(results: List[Dict]) -> List[Dict]:
+    """Keep the best-scored copy of each identical page_content (input sorted by score)."""
+    seen = set()
+    unique = []
+    for r in results:
+        key = _normalize_query(r["page_content"])
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(r)
+    return unique
+
+
+class Retriever:
+    def __init__(self, embeddings=None):
+        self.embeddings = embeddings or build_query_embeddings(build_embeddings())
+
+        self.index_version = read_index_version(index_dir())
+        self._bitmaps: MetadataBitmapIndex | None = None
+        self._sparse: BM25Index | None = None
+        self._sparse_loaded = False
+
         # Use project data paths
         if Config.DB_TYPE == "chroma":
             self.vs = Chroma(
-                persist_directory="data/chroma_db",
+                persist_directory=Config.CHROMA_DIR,
                 embedding_function=self.embeddings
             )
+        elif Config.DB_TYPE == "numpy":
+            self.vs = NumpyVectorStore.load(
+                Config.NUMPY_DIR,
+                self.embeddings,
+                quantization=Config.NUMPY_QUANTIZATION,
+                rerank_factor=Config.NUMPY_RERANK_FACTOR,
+            )
         else:
             self.vs = FAISS.load_local(
-                "data/faiss_db",
+                Config.FAISS_DIR,
                 self.embeddings,
                 allow_dangerous_deserialization=True
             )
 
+    def _faiss_bitmaps(self) -> MetadataBitmapIndex:
+        """Metadata of the FAISS rows in index order (built once per Retriever)."""
+        if self._bitmaps is None:
+            self._bitmaps = MetadataBitmapIndex([
+                self.vs.docstore.search(self.vs.index_to_docstore_id[i]).metadata
+                for i in range(self.vs.index.ntotal)
+            ])
+        return self._bitmaps
+
+    @property
+    def sparse(self) -> BM25Index | None:
+        """BM25 index saved by ingest, loaded on first hybrid query (None if absent)."""
+        if not self._sparse_loaded:
+            self._sparse = BM25Index.load(index_dir())
+            self._sparse_loaded = True
+        return self._sparse
+
+    def _cache_key(self, query: str, k: int, filters: Dict[str, Any] | None, hybrid: bool) -> tuple:
+        return (
+            Config.DB_TYPE,
+            self.index_version,
+            _normalize_query(query),
+            k,
+            json.dumps(filters or {}, sort_keys=True, ensure_ascii=False, default=str),
+            hybrid,
+        )
+
     def retrieve(
         self,
         query: str,
         k: int = 5,
-        filters: Dict[str, Any] | None = None
+        filters: Dict[str, Any] | None = None,
+        hybrid: bool | None = None
     ) -> List[Dict]:
-        raw = self.vs.similarity_search_with_relevance_scores(
-            query,
-            k=k * 2,
-            filter=filters if isinstance(self.vs, Chroma) else None
-        )
+        """
+        hybrid: fuse dense and BM25 results (reciprocal-rank fusion);
+        None -> Config.HYBRID_SEARCH
+        """
+        hybrid = Config.HYBRID_SEARCH if hybrid is None else hybrid
+
+        if not Config.RETRIEVAL_CACHE_ENABLED:
+            return self._retrieve(query, k, filters, hybrid)
+
+        key = self._cache_key(query, k, filters, hybrid)
+        cached = _results.get(key)
+        if cached is None:
+            cached = self._retrieve(query, k, filters, hybrid)
+            _results.set(key, cached)
+
+        # callers get their own list / dicts
+        return [dict(r) for r in cached]
+
+    def _retrieve(self, query: str, k: int, filters: Dict[str, Any] | None, hybrid: bool) -> List[Dict]:
+        if not hybrid or self.sparse is None:
+            return self._search(query, k, filters)
+
+        dense = self._search(query, k * 2, filters)
+        sparse = _unique_content(self.sparse.search(query, k * 2, filters))
+        return _unique_content(rrf_fuse([dense, sparse], rrf_k=Config.HYBRID_RRF_K))[:k]
+
+    def _search(
+        self,
+        query: str,
+        k: int,
+        filters: Dict[str, Any] | None
+    ) -> List[Dict]:
+        # Filters are pushed down into every backend: top-k is exact over matching docs
+        if isinstance(self.vs, Chroma):
+            raw = self.vs.similarity_search_with_relevance_scores(
+                query, k=k * 2, filter=to_chroma_where(filters)
+            )
+        elif isinstance(self.vs, NumpyVectorStore):
+            raw = self.vs.similarity_search_with_relevance_scores(query, k=k * 2, filter=filters)
+        else:
+            raw = faiss_search(
+                self.vs, self._faiss_bitmaps(), self.embeddings.embed_query(query), k * 2, filters or {}
+            )
 
         results: List[Dict] = []
         for doc, score in raw:
@@ -70,4 +280,4 @@ class Retriever:
             })
 
         results.sort(key=lambda x: x["score"], reverse=True)
-        return results[:k]
+        return _unique_content(results)[:k]
@@ -0,0 +1,157 @@
+"""
+Sparse (BM25) index for hybrid retrieval
+- Vietnamese-aware tokenizer: NFC, lowercase, diacritics folded (đ -> d),
+  syllables + syllable bigrams (Vietnamese words are mostly 2 syllables)
+- Built at ingest time, saved next to the vector store (bm25.json),
+  loaded lazily by the Retriever (postings are rebuilt on load)
+- Reciprocal-rank fusion of dense and sparse result lists
+"""
+
+import json
+import math
+import os
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from .filters import MetadataBitmapIndex
+
+SPARSE_FILE = "bm25.json"
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip Vietnamese diacritics: 'Dinh dưỡng' -> 'dinh duong'."""
+    text = unicodedata.normalize("NFD", text.lower()).replace("đ", "d")
+    return "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
+
+
+def tokenize(text: str) -> List[str]:
+    syllables = _TOKEN_RE.findall(fold(unicodedata.normalize("NFC", text)))
+    return syllables + [f"{a}_{b}" for a, b in zip(syllables, syllables[1:])]
+
+
+class BM25Index:
+    def __init__(self, docs: Dict[str, dict] | None = None, k1: float = 1.5, b: float = 0.75):
+        # id -> {"text": str, "metadata": dict}
+        self.docs: Dict[str, dict] = docs or {}
+        self.k1 = k1
+        self.b = b
+        self._build()
+
+    def _build(self) -> None:
+        self.ids = list(self.docs)
+        self.doc_len = np.zeros(len(self.ids), dtype=np.float32)
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+
+        for row, doc_id in enumerate(self.ids):
+            tf = Counter(tokenize(self.docs[doc_id]["text"]))
+            self.doc_len[row] = sum(tf.values())
+            for term, count in tf.items():
+                postings[term].append((row, count))
+
+        n = len(self.ids)
+        self.avg_len = float(self.doc_len.mean()) if n else 0.0
+        self.postings = {
+            term: (
+                np.fromiter((r for r, _ in p), dtype=np.int32, count=len(p)),
+                np.fromiter((c for _, c in p), dtype=np.float32, count=len(p)),
+                math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)),
+            )
+            for term, p in postings.items()
+        }
+        self.bitmaps = MetadataBitmapIndex([self.docs[i]["metadata"] for i in self.ids])
+
+    # ==============================
+    # Ingest
+    # ==============================
+
+    def upsert(self, ids: List[str], texts: List[str], metadatas: List[dict], build: bool = True) -> None:
+        """build=False: only record the docs (the next upsert / delete rebuilds)."""
+        for doc_id, text, metadata in zip(ids, texts, metadatas):
+            self.docs[doc_id] = {"text": text, "metadata": metadata}
+        if build:
+            self._build()
+
+    def delete(self, ids: List[str], build: bool = True) -> None:
+        for doc_id in ids:
+            self.docs.pop(doc_id, None)
+        if build:
+            self._build()
+
+    def save(self, path: str) -> None:
+        base = Path(path)
+        base.mkdir(parents=True, exist_ok=True)
+        tmp = base / (SPARSE_FILE + ".tmp")
+        tmp.write_text(
+            json.dumps({"k1": self.k1, "b": self.b, "docs": self.docs}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        os.replace(tmp, base / SPARSE_FILE)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index | None":
+        file = Path(path) / SPARSE_FILE
+        if not file.exists():
+            return None
+        data = json.loads(file.read_text(encoding="utf-8"))
+        return cls(data["docs"], k1=data["k1"], b=data["b"])
+
+    # ==============================
+    # Search
+    # ==============================
+
+    def search(self, query: str, k: int, filters: Dict[str, Any] | None = None) -> List[Dict]:
+        if not self.ids:
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / (self.avg_len or 1.0))
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            rows, tf, idf = posting
+            scores[rows] += idf * tf * (self.k1 + 1) / (tf + norm[rows])
+
+        mask = self.bitmaps.mask(filters)
+        if mask is not None:
+            scores[~mask] = 0.0
+
+        hits = np.flatnonzero(scores > 0)
+        if not len(hits):
+            return []
+        top = hits[np.argsort(-scores[hits])[:k]]
+
+        return [
+            {
+                "page_content": self.docs[self.ids[i]]["text"],
+                "metadata": self.docs[self.ids[i]]["metadata"],
+                "score": float(scores[i]),
+            }
+            for i in top
+        ]
+
+
+def _result_key(r: Dict) -> Any:
+    m = r["metadata"]
+    if "chunk_id" in m:
+        return (m.get("path") or m.get("source"), m["chunk_id"])
+    return r["page_content"]
+
+
+def rrf_fuse(result_lists: List[List[Dict]], rrf_k: int = 60) -> List[Dict]:
+    """Reciprocal-rank fusion: score = sum(1 / (rrf_k + rank)) over the lists."""
+    fused: Dict[Any, Dict] = {}
+    for results in result_lists:
+        for rank, r in enumerate(results, start=1):
+            key = _result_key(r)
+            entry = fused.setdefault(key, dict(r, score=0.0))
+            entry["score"] += 1.0 / (rrf_k + rank)
+
+    return sorted(fused.values(), key=lambda x: x["score"], reverse=True)
@@ -0,0 +1,36 @@
+from starlette.requests import Request
+from starlette.routing import Mount, Route
+
+from app.controllers.agent_async_controller import AgentAsyncController
+
+PREFIX = "/api/v3/agent"
+
+
+# ===== CHAT =====
+async def chat(request: Request):
+    return await AgentAsyncController.chat(request)
+
+
+async def workout_plan(request: Request):
+    if request.method == "GET":
+        return await AgentAsyncController.get_workout_plan(request)
+
+    # POST
+    return await AgentAsyncController.create_workout_plan(request)
+
+
+async def meal_plan(request: Request):
+    if request.method == "GET":
+        return await AgentAsyncController.get_meal_plan(request)
+
+    # POST
+    return await AgentAsyncController.create_meal_plan(request)
+
+
+agent_async_routes = [
+    Mount(PREFIX, routes=[
+        Route("/chat", chat, methods=["POST"]),
+        Route("/workout-plan", workout_plan, methods=["GET", "POST"]),
+        Route("/meal-plan", meal_plan, methods=["GET", "POST"]),
+    ])
+]
@@ -2,6 +2,7 @@
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required, get_jwt
 from app.controllers.agent_controller import AgentController
+from app.controllers.admin_controller import AdminController
 
 agent_bp = Blueprint("agent", __name__, url_prefix="/api/v3/agent")
 
@@ -15,6 +16,14 @@ def chat():
     return AgentController.chat()
 
 
+@agent_bp.route("/chat/stream", methods=["OPTIONS", "POST"])
+@jwt_required()
+def chat_stream():
+    if request.method == "OPTIONS":
+        return "", 204
+    return AgentController.chat_stream()
+
+
 @agent_bp.route("/workout-plan", methods=["OPTIONS", "GET", "POST"])
 @jwt_required()
 def workout_plan():
@@ -75,3 +84,16 @@ def meal_plan_db():
 
     if request.method == "DELETE":
         return AgentController.delete_meal_plan()
+
+
+# ===== ADMIN =====
+@agent_bp.route("/admin/metrics", methods=["GET"])
+def admin_metrics():
+    return AdminController.get_metrics()
+
+
+@agent_bp.route("/admin/answer-cache", methods=["GET", "DELETE"])
+def admin_answer_cache():
+    if request.method == "DELETE":
+        return AdminController.flush_answer_cache()
+    return AdminController.get_answer_cache()
@@ -1,9 +1,27 @@
+import json
+
 from app.agent import (
     handle_chat,
+    handle_chat_stream,
     create_meal_plan,
-    create_workout_plan
+    create_workout_plan,
+    ahandle_chat,
+    acreate_meal_plan,
+    acreate_workout_plan
 )
 from app.memory.store import get_user_state
+from app.memory.repository import UserStateRepositoryImpl
+
+_repo = UserStateRepositoryImpl()
+
+
+def _plan_json_body(entry) -> str:
+    # Stored plan JSON is embedded as-is (no decode / re-encode)
+    return (
+        '{"type": "message", "plan": ' + entry["plan"]
+        + ', "start_date": ' + json.dumps(entry["start_date"])
+        + ', "end_date": ' + json.dumps(entry["end_date"]) + "}"
+    )
 
 
 class AgentService:
@@ -16,6 +34,14 @@ class AgentService:
             message=message
         )
 
+    @staticmethod
+    def chat_stream(llm, user_id: int, message: str):
+        return handle_chat_stream(
+            llm=llm,
+            user_id=user_id,
+            message=message
+        )
+
     # ===== MEAL PLAN =====
     @staticmethod
     def get_meal_plan(user_id: int):
@@ -33,6 +59,15 @@ class AgentService:
             "end_date": plan["end_date"]
         }
 
+    @staticmethod
+    def get_meal_plan_json(user_id: int) -> str | None:
+        """
+        GET body built straight from the stored JSON (meal_plan column only).
+        None -> no plan.
+        """
+        entry = _repo.get_plan_json(user_id, "meal_plan")
+        return _plan_json_body(entry) if entry else None
+
     @staticmethod
     def create_meal_plan(llm, user_id: int, goal_input: dict):
         # goal_input hiện đã được chuẩn hóa từ controller
@@ -55,6 +90,11 @@ class AgentService:
             "end_date": plan["end_date"]
         }
 
+    @staticmethod
+    def get_workout_plan_json(user_id: int) -> str | None:
+        entry = _repo.get_plan_json(user_id, "workout_plan")
+        return _plan_json_body(entry) if entry else None
+
     @staticmethod
     def create_workout_plan(llm, user_id: int, profile_input: dict):
         return create_workout_plan(
@@ -62,3 +102,24 @@ class AgentService:
             user_id=user_id,
             profile=profile_input
         )
+
+    # ===== ASYNC (ASGI) =====
+    @staticmethod
+    async def achat(llm, user_id: int, message: str):
+        return await ahandle_chat(
+            llm=llm,
+            user_id=user_id,
+            message=message
+        )
+
+    @staticmethod
+    async def acreate_meal_plan(llm, user_id: int, goal_input: dict):
+        return await acreate_meal_plan(llm, user_id, goal_input)
+
+    @staticmethod
+    async def acreate_workout_plan(llm, user_id: int, profile_input: dict):
+        return await acreate_workout_plan(
+            llm=llm,
+            user_id=user_id,
+            profile=profile_input
+        )
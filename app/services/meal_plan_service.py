@@ -1,49 +1,33 @@
 # app/services/meal_plan_service.py
 
-from app import db
-from app.models.user_plan import UserPlan
+from app.memory.repository import UserStateRepositoryImpl
+from app.memory.store import invalidate_user_state
+
+_repo = UserStateRepositoryImpl()
 
 
 class MealPlanService:
     @staticmethod
     def get_by_user_id(user_id: int):
-        plan = UserPlan.query.filter_by(user_id=user_id).first()
-        if not plan or not plan.meal_plan:
-            return None
-        return plan.meal_plan
+        return _repo.get_plan(user_id, "meal_plan") or None
     @staticmethod
     def create(user_id: int, plan: dict):
-        user_plan = UserPlan.query.filter_by(user_id=user_id).first()
-
-        if not user_plan:
-            user_plan = UserPlan(
-                user_id=user_id,
-                meal_plan=plan
-            )
-            db.session.add(user_plan)
-        else:
-            user_plan.meal_plan = plan
-
-        db.session.commit()
+        # INSERT ... ON DUPLICATE KEY UPDATE meal_plan
+        _repo.upsert_columns(user_id, {"meal_plan": plan})
+        invalidate_user_state(user_id)
         return plan
 
     @staticmethod
     def update(user_id: int, plan: dict):
-        user_plan = UserPlan.query.filter_by(user_id=user_id).first()
-
-        if not user_plan or not user_plan.meal_plan:
+        if not _repo.update_column(user_id, "meal_plan", plan):
             raise ValueError("Meal plan not found")
 
-        user_plan.meal_plan = plan
-        db.session.commit()
+        invalidate_user_state(user_id)
         return plan
 
     @staticmethod
     def delete(user_id: int):
-        user_plan = UserPlan.query.filter_by(user_id=user_id).first()
-
-        if not user_plan or not user_plan.meal_plan:
+        if not _repo.update_column(user_id, "meal_plan", None):
             raise ValueError("Meal plan not found")
 
-        user_plan.meal_plan = None
-        db.session.commit()
+        invalidate_user_state(user_id)
@@ -0,0 +1,206 @@
+"""
+Cache helpers
+- TTLCache: thread-safe in-process LRU with per-entry TTL and hit/miss stats
+- SQLiteTTLStore: small on-disk key/value store shared by all workers on a host
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Hashable
+
+from app.utils import metrics
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    LRU cache with an optional TTL per entry.
+
+    If `name` is given, hits / misses / evictions are also reported
+    to app.utils.metrics as "<name>.hit", "<name>.miss", ...
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None, name: str | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple[Any, float | None]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def _count(self, stat: str, metric: str) -> None:
+        self._stats[stat] += 1
+        if self.name:
+            metrics.incr(f"{self.name}.{metric}")
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self._count("misses", "miss")
+                return default
+
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                self._count("expired", "expired")
+                self._count("misses", "miss")
+                return default
+
+            self._data.move_to_end(key)
+            self._count("hits", "hit")
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._count("evictions", "eviction")
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        return default if item is _MISSING else item[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry; returns how many were removed."""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (_, exp) in self._data.items() if exp is not None and exp <= now]
+            for k in expired:
+                del self._data[k]
+            self._stats["expired"] += len(expired)
+        if self.name and expired:
+            metrics.incr(f"{self.name}.expired", len(expired))
+        return len(expired)
+
+    def items(self) -> list:
+        """Snapshot of live (key, value) pairs, least recently used first."""
+        now = time.time()
+        with self._lock:
+            return [
+                (k, v) for k, (v, exp) in self._data.items()
+                if exp is None or exp > now
+            ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(
+                self._stats,
+                size=len(self._data),
+                maxsize=self.maxsize,
+                hit_rate=(self._stats["hits"] / lookups) if lookups else 0.0,
+            )
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+        return item is not _MISSING and (item[1] is None or item[1] > time.time())
+
+
+class SQLiteTTLStore:
+    """
+    Key/value table in a SQLite file (values are str or bytes).
+
+    One connection per thread; WAL mode so several gunicorn workers
+    can read and write the same file.
+    """
+
+    def __init__(self, path: str, table: str = "kv", max_rows: int | None = None):
+        self.path = path
+        self.table = table
+        self.max_rows = max_rows
+        self._local = threading.local()
+        self._writes = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value BLOB, expires_at REAL, updated_at REAL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_updated ON {table}(updated_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        row = self._conn().execute(
+            f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if not row:
+            return None
+
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key: str, value, ttl: float | None = None) -> None:
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                f"INSERT INTO {self.table} (key, value, expires_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+                "expires_at = excluded.expires_at, updated_at = excluded.updated_at",
+                (key, value, now + ttl if ttl else None, now),
+            )
+
+        # Housekeeping every 100 writes: expired rows + size cap
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self.purge_expired()
+            self._enforce_max_rows()
+
+    def delete(self, key: str) -> None:
+        with self._conn() as conn:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._conn() as conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+    def purge_expired(self) -> int:
+        with self._conn() as conn:
+            cur = conn.execute(
+                f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),),
+            )
+        return cur.rowcount
+
+    def _enforce_max_rows(self) -> None:
+        if not self.max_rows:
+            return
+        with self._conn() as conn:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            )
+
+    def __len__(self) -> int:
+        return self._conn().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
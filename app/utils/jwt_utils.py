@@ -17,10 +17,19 @@ def get_access_token(request: Request) -> str:
         raise ValueError("Invalid Authorization header format")
 
     return parts[1]
-from flask_jwt_extended import get_jwt
+from flask_jwt_extended import get_jwt, decode_token
 
 
 def get_user_id_from_token():
     claims = get_jwt()
     user_id = claims.get("userId")
     return user_id
+
+
+def get_user_id_from_access_token(access_token: str):
+    """
+    Decode a raw access token outside a Flask request (e.g. ASGI).
+    Needs an active app context for the JWT config; raises on invalid tokens.
+    """
+    claims = decode_token(access_token)
+    return claims.get("userId")
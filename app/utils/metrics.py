@@ -0,0 +1,63 @@
+"""
+In-process metrics
+- Thread-safe counters and timings (per worker process)
+- Read through the admin metrics endpoint
+"""
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(int)
+_timings: Dict[str, Dict[str, float]] = {}
+
+
+def incr(name: str, value: float = 1) -> None:
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name: str, seconds: float) -> None:
+    """Record one duration sample (count / total / max)."""
+    with _lock:
+        t = _timings.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+        t["count"] += 1
+        t["total_s"] += seconds
+        t["max_s"] = max(t["max_s"], seconds)
+
+
+@contextmanager
+def timed(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def get_counter(name: str) -> float:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def snapshot(prefix: str | None = None) -> dict:
+    with _lock:
+        counters = {
+            k: v for k, v in _counters.items()
+            if prefix is None or k.startswith(prefix)
+        }
+        timings = {
+            k: dict(v, avg_s=(v["total_s"] / v["count"]) if v["count"] else 0.0)
+            for k, v in _timings.items()
+            if prefix is None or k.startswith(prefix)
+        }
+    return {"counters": counters, "timings": timings}
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _timings.clear()
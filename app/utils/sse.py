@@ -0,0 +1,11 @@
+import json
+from typing import Any
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Encode one Server-Sent Event.
+    `data` is serialized as a single JSON line so newlines in tokens are safe.
+    """
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
@@ -0,0 +1,23 @@
+import os
+
+from dotenv import load_dotenv
+
+# Server processes load the retriever and precompute workout retrievals at
+# startup; the env / .env still wins (RETRIEVER_WARMUP=false skips both)
+load_dotenv()
+os.environ.setdefault("RETRIEVER_WARMUP", "true")
+os.environ.setdefault("RETRIEVAL_PRECOMPUTE", "true")
+
+import uvicorn
+
+from app.asgi import create_asgi_app
+from app.config import Config
+
+app = create_asgi_app()
+
+if __name__ == "__main__":
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=Config.FLASK_PORT
+    )
@@ -0,0 +1,77 @@
+"""
+Benchmark: PDF parsing + chunking, sequential vs process pool.
+
+    python -m benchmarks.bench_pdf_loading [--data-dir data/PDF] [--workers 4]
+
+Each mode runs in a fresh subprocess so peak RSS is measured per mode
+(main process, and the largest worker process for the parallel mode).
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+
+def _measure(data_dir: str, workers: int) -> dict:
+    from app.rag.ingest import iter_chunks, iter_documents
+
+    start = time.perf_counter()
+    pages = chunks = 0
+
+    def counted(docs):
+        nonlocal pages
+        for d in docs:
+            pages += 1
+            yield d
+
+    for _ in iter_chunks(counted(iter_documents(data_dir, workers=workers))):
+        chunks += 1
+
+    return {
+        "wall_s": time.perf_counter() - start,
+        "pages": pages,
+        "chunks": chunks,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_worker_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+def _run_child(data_dir: str, workers: int) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_pdf_loading",
+         "--data-dir", data_dir, "--workers", str(workers), "--child"],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", default="data/PDF")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_measure(args.data_dir, args.workers)))
+        return
+
+    seq = _run_child(args.data_dir, 1)
+    par = _run_child(args.data_dir, args.workers)
+
+    print(f"{'mode':<16}{'wall s':>10}{'pages':>8}{'chunks':>8}{'rss MB':>10}{'worker MB':>11}")
+    for label, r in (("sequential", seq), (f"parallel x{args.workers}", par)):
+        print(
+            f"{label:<16}{r['wall_s']:>10.2f}{r['pages']:>8}{r['chunks']:>8}"
+            f"{r['peak_rss_mb']:>10.1f}{r['peak_worker_rss_mb']:>11.1f}"
+        )
+    print(f"speedup: {seq['wall_s'] / par['wall_s']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Benchmark: vector store backends (numpy mmap vs Chroma vs FAISS).
+
+    python -m benchmarks.bench_vector_backends [--n 5000] [--dim 1536] [--queries 200] [--k 8]
+
+Synthetic normalized vectors, searched by vector (no embedding calls), so only
+load time and search latency are compared. Half of the documents carry
+locale="vi" to time a filtered query as well. FAISS is skipped if not installed.
+numpy-int8 uses the quantized first pass + float32 re-rank;
+recall is measured against the exact numpy top-k.
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import FakeEmbeddings
+
+from app.rag.numpy_store import NumpyVectorStore
+
+
+def _corpus(n: int, dim: int):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"doc-{i}" for i in range(n)]
+    texts = [f"chunk {i}" for i in range(n)]
+    metadatas = [{"locale": "vi" if i % 2 else "en", "chunk_id": i} for i in range(n)]
+    queries = rng.standard_normal((200, dim)).astype(np.float32)
+    return vectors, ids, texts, metadatas, queries
+
+
+def _dir_mb(path: str) -> float:
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file()) / 2**20
+
+
+def _latency(search, queries) -> dict:
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        search(q)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {"p50": statistics.median(samples), "p95": samples[int(len(samples) * 0.95) - 1]}
+
+
+def _build_numpy(corpus, emb) -> str:
+    vectors, ids, texts, metadatas, _ = corpus
+    path = tempfile.mkdtemp(prefix="bench_numpy_")
+    store = NumpyVectorStore.empty(emb)
+    store.add_embeddings(zip(texts, vectors), metadatas=metadatas, ids=ids)
+    store.save(path, quantization="int8")
+    return path
+
+
+def bench_numpy(corpus, emb, k, quantization=None, path=None):
+    queries = corpus[4]
+    path = path or _build_numpy(corpus, emb)
+
+    start = time.perf_counter()
+    store = NumpyVectorStore.load(path, emb, quantization=quantization)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    scan = store.quantized if store.quantized is not None else store.vectors
+    return {
+        "load_ms": load_ms,
+        "size_mb": scan.nbytes / 2**20,
+        "query": _latency(lambda q: store.search_by_vector(q, k), queries),
+        "filtered": _latency(lambda q: store.search_by_vector(q, k, {"locale": "vi"}), queries),
+        "store": store,
+    }
+
+
+def recall(store, exact, queries, k) -> float:
+    """Share of the exact top-k ids found by the quantized first pass + re-rank."""
+    hits = 0
+    for q in queries:
+        truth = {i for i, _ in exact.search_by_vector(q, k)}
+        hits += len(truth & {i for i, _ in store.search_by_vector(q, k)})
+    return hits / (len(queries) * k)
+
+
+def bench_chroma(corpus, emb, k):
+    from langchain_community.vectorstores import Chroma
+
+    vectors, ids, texts, metadatas, queries = corpus
+    path = tempfile.mkdtemp(prefix="bench_chroma_")
+    vs = Chroma(persist_directory=path, embedding_function=emb)
+    for i in range(0, len(ids), 2000):
+        vs._collection.upsert(
+            ids=ids[i:i + 2000],
+            embeddings=vectors[i:i + 2000].tolist(),
+            metadatas=metadatas[i:i + 2000],
+            documents=texts[i:i + 2000],
+        )
+    del vs
+
+    start = time.perf_counter()
+    vs = Chroma(persist_directory=path, embedding_function=emb)
+    vs._collection.count()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    search = vs.similarity_search_by_vector_with_relevance_scores
+    return {
+        "load_ms": load_ms,
+        "size_mb": _dir_mb(path),
+        "query": _latency(lambda q: search(q.tolist(), k=k), queries),
+        "filtered": _latency(lambda q: search(q.tolist(), k=k, filter={"locale": "vi"}), queries),
+    }
+
+
+def bench_faiss(corpus, emb, k):
+    from langchain_community.vectorstores import FAISS
+
+    vectors, ids, texts, metadatas, queries = corpus
+    path = tempfile.mkdtemp(prefix="bench_faiss_")
+    FAISS.from_embeddings(
+        list(zip(texts, vectors.tolist())), emb, metadatas=metadatas, ids=ids
+    ).save_local(path)
+
+    start = time.perf_counter()
+    vs = FAISS.load_local(path, emb, allow_dangerous_deserialization=True)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    search = vs.similarity_search_with_score_by_vector
+    return {
+        "load_ms": load_ms,
+        "size_mb": _dir_mb(path),
+        "query": _latency(lambda q: search(q.tolist(), k=k), queries),
+        "filtered": _latency(lambda q: search(q.tolist(), k=k, filter={"locale": "vi"}), queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=8)
+    args = parser.parse_args()
+
+    corpus = _corpus(args.n, args.dim)
+    corpus = corpus[:4] + (corpus[4][:args.queries],)
+    emb = FakeEmbeddings(size=args.dim)
+
+    print(f"{args.n} vectors x {args.dim} dims, k={args.k}, {args.queries} queries")
+    print("MB = on-disk size (chroma / faiss) or size of the scanned matrix (numpy)")
+    print(f"{'backend':<14}{'load ms':>10}{'MB':>10}{'p50 ms':>10}{'p95 ms':>10}{'filt p50':>10}{'filt p95':>10}{'recall':>8}")
+
+    numpy_path = _build_numpy(corpus, emb)
+    exact = None
+    backends = (
+        ("numpy", lambda: bench_numpy(corpus, emb, args.k, path=numpy_path)),
+        ("numpy-int8", lambda: bench_numpy(corpus, emb, args.k, "int8", numpy_path)),
+        ("chroma", lambda: bench_chroma(corpus, emb, args.k)),
+        ("faiss", lambda: bench_faiss(corpus, emb, args.k)),
+    )
+    for name, bench in backends:
+        try:
+            r = bench()
+        except ImportError as e:
+            print(f"{name:<14}skipped ({e})")
+            continue
+
+        rec = ""
+        if "store" in r:
+            exact = exact or r["store"]
+            rec = f"{recall(r['store'], exact, corpus[4][:50], args.k):.3f}"
+        print(
+            f"{name:<14}{r['load_ms']:>10.1f}{r['size_mb']:>10.1f}"
+            f"{r['query']['p50']:>10.2f}{r['query']['p95']:>10.2f}"
+            f"{r['filtered']['p50']:>10.2f}{r['filtered']['p95']:>10.2f}{rec:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,13 @@
+import os
+
+from dotenv import load_dotenv
+
+# Server processes load the retriever and precompute workout retrievals at
+# startup; the env / .env still wins (RETRIEVER_WARMUP=false skips both)
+load_dotenv()
+os.environ.setdefault("RETRIEVER_WARMUP", "true")
+os.environ.setdefault("RETRIEVAL_PRECOMPUTE", "true")
+
 from app import create_app
 from app.config import Config
 